@@ -1,19 +1,34 @@
 """Animated ASCII double helix spinner with setup phase logging."""
 
 import math
-import threading
 import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 
 from rich.console import Console, Group
 from rich.live import Live
+from rich.style import Style
 from rich.table import Table
-from rich.text import Text
+from rich.text import Span, Text
 
 ROWS = 6
 HALF = 5
 CENTER = 6
 SPINNER = "/-\\|"
 
+# The strands advance 0.18 rad per frame and 35 frames come within 0.02
+# rad of a full turn, so each row's sin/cos is a 35-entry table indexed
+# by frame number instead of trig on every render.
+_PHASE_STEP = 0.18
+_PERIOD = 35
+_ROW_SIN = tuple(
+    tuple(math.sin(r * 0.55 + f * _PHASE_STEP) for f in range(_PERIOD)) for r in range(ROWS)
+)
+_ROW_COS = tuple(
+    tuple(math.cos(r * 0.55 + f * _PHASE_STEP) for f in range(_PERIOD)) for r in range(ROWS)
+)
+
 TITLE_LINES = [
     "[bold bright_cyan]╭─╮ ╭─╮ ╷ ╭┬╮ ╭─╮ ╭─╮ ╭─╮ ╷ ╭─╮ ╷",
     "[bold bright_cyan]├─╯ ├┬╯ │ │││ │ │ ├┬╯ │ │ │ ├─┤ │",
@@ -22,15 +37,34 @@ TITLE_LINES = [
     "[bold bright_green]├─┤ │╶╮ ├╴  │╰┤  │  ╰─╮  │  │ │ ├┬╯ ├╴",
     "[bold bright_green]╵ ╵ ╰─╯ ╰─╴ ╵ ╵  ╵  ╰─╯  ╵  ╰─╯ ╵╰╴ ╰─╴",
 ]
+# Parsed once; rendering doesn't mutate Text, so frames share these.
+_TITLE_TEXTS = tuple(Text.from_markup(line) for line in TITLE_LINES)
+_HINT_TEXT = Text.from_markup("[dim]Type 'exit' or Ctrl+C to quit[/dim]")
+
+
+# _STRAND_CHARS[depth][slope]. depth: front (z > 0), side (z > -0.2),
+# back. slope: vertical (|dx| < 0.12), leaning right, leaning left.
+_STRAND_CHARS = (
+    ("|", "\\", "/"),
+    (":", "\\", "/"),
+    (":", ".", "."),
+)
+
+
+# Parsed once: strand styles by colour, in the order front, side, back.
+_STRAND_STYLES = {
+    c: (Style.parse(f"bold bright_{c}"), Style.parse(c), Style.parse(f"dim {c}"))
+    for c in ("green", "cyan")
+}
+_S_MORPHED = Style.parse("bold bright_green")
+_S_CROSSING = Style.parse("bright_green")
 
 
 def _strand_char(dx: float, z: float) -> str:
     """Pick strand character based on visual slope and depth."""
-    if abs(dx) < 0.12:
-        return "|" if z > 0 else ":"
-    if dx > 0:
-        return "\\" if z > -0.2 else "."
-    return "/" if z > -0.2 else "."
+    slope = 0 if -0.12 < dx < 0.12 else (1 if dx > 0 else 2)
+    depth = 0 if z > 0 else (1 if z > -0.2 else 2)
+    return _STRAND_CHARS[depth][slope]
 
 
 def _cell_chars(r: int, total: int) -> tuple[str, str]:
@@ -40,19 +74,69 @@ def _cell_chars(r: int, total: int) -> tuple[str, str]:
     return ("│", "│")
 
 
-def _helix_frame(phase: float, morph: float = 0.0, morph_style: str = "checklist") -> list[Text]:
-    """Render one frame of the helix. morph (0-1) blends toward a shape.
+_S_FACE = Style.parse("bold bright_cyan")
+_S_PENDING = Style.parse("dim cyan")
+_S_DIM = Style.parse("dim")
+
+
+def _smiley_decor(r: int, lx: int, rx: int) -> tuple[list, list]:
+    """Face drawn inside the ellipse: eyes on row 2, mouth on row 3."""
+    marks = [(lx, "("), (rx, ")")]
+    spans = []
+    if r == 2:
+        third = (rx - lx) // 3
+        for x in (lx + third, rx - third):
+            marks.append((x, "o"))
+            spans.append((x, x + 1, _S_FACE))
+    elif r == 3:
+        mid = (lx + rx) // 2
+        marks.append((mid, "‿"))
+        spans.append((mid, mid + 1, _S_FACE))
+    return marks, spans
+
+
+def _checklist_decor(r: int, lx: int, rx: int) -> tuple[list, list]:
+    """Box edges, with a checkmark and a dim line on the inner rows."""
+    lc, rc = _cell_chars(r, ROWS)
+    marks = [(lx, lc), (rx, rc)]
+    spans = []
+    if r == 0 or r == ROWS - 1:
+        marks.extend((x, "─") for x in range(lx + 1, rx))
+    else:
+        mark_x = lx + 2
+        marks.append((mark_x, "✓" if r <= 3 else "·"))
+        marks.extend((x, "─") for x in range(mark_x + 2, rx - 1))
+        spans.append((mark_x, mark_x + 1, _S_MORPHED if r <= 3 else _S_PENDING))
+        spans.append((mark_x + 2, rx - 1, _S_DIM))
+    return marks, spans
+
+
+# Fully-morphed row decoration per morph_style: (marks, spans) where
+# marks are (x, char) and spans are (start, end, Style).
+_MORPH_DECOR = {"smiley": _smiley_decor, "checklist": _checklist_decor}
+
+
+def _helix_frame(frame: int, morph: float = 0.0, morph_style: str = "checklist") -> list[Text]:
+    """Render helix frame number `frame`. morph (0-1) blends toward a shape.
 
     morph_style: "checklist" (square with checkmarks) or "smiley" (ellipse with face).
     """
     morph = max(0.0, min(1.0, morph))
+    rows = _helix_rows(frame % _PERIOD, morph, morph_style)
+    # Text is mutable, so hand out fresh copies of the cached rows.
+    return [Text(plain, spans=list(spans)) for plain, spans in rows]
+
+
+@lru_cache(maxsize=512)
+def _helix_rows(f: int, morph: float, morph_style: str) -> tuple[tuple[str, tuple[Span, ...]], ...]:
+    """Plain text and style spans for each helix row; frames repeat every _PERIOD."""
     lines = []
     for r in range(ROWS):
-        t = r * 0.55 + phase
-        # Helix positions
-        hx1 = CENTER + math.sin(t) * HALF
-        hx2 = CENTER + math.sin(t + math.pi) * HALF
-        hz1 = math.cos(t)
+        # Helix positions; the second strand is half a turn behind
+        sin_t = _ROW_SIN[r][f]
+        hx1 = CENTER + sin_t * HALF
+        hx2 = CENTER - sin_t * HALF
+        hz1 = _ROW_COS[r][f]
 
         if morph_style == "smiley":
             # Ellipse target
@@ -82,10 +166,8 @@ def _helix_frame(phase: float, morph: float = 0.0, morph_style: str = "checklist
                 else:
                     front_dx = dx1 if z1 > 0 else dx2
                     ch[cx] = _strand_char(front_dx, 0.5)
-            ln = Text("".join(ch))
-            if 0 <= cx < width:
-                ln.stylize("bright_green", cx, cx + 1)
-            lines.append(ln)
+            spans = [Span(cx, cx + 1, _S_CROSSING)] if 0 <= cx < width else []
+            lines.append(("".join(ch), tuple(spans)))
             continue
 
         lx, rx = (x1, x2) if x1 < x2 else (x2, x1)
@@ -95,84 +177,34 @@ def _helix_frame(phase: float, morph: float = 0.0, morph_style: str = "checklist
         rdx = dx2 if x1 < x2 else dx1
 
         if morph > 0.9:
-            if morph_style == "smiley":
-                # Smiley face morph
-                if 0 <= lx < width:
-                    ch[lx] = "("
-                if 0 <= rx < width:
-                    ch[rx] = ")"
-                mid = (lx + rx) // 2
-                if r == 2:
-                    le = lx + (rx - lx) // 3
-                    re = rx - (rx - lx) // 3
-                    if 0 <= le < width:
-                        ch[le] = "o"
-                    if 0 <= re < width:
-                        ch[re] = "o"
-                elif r == 3:
-                    if 0 <= mid < width:
-                        ch[mid] = "‿"
-            else:
-                # Checklist morph
-                lc, rc = _cell_chars(r, ROWS)
-                if 0 <= lx < width:
-                    ch[lx] = lc
-                if 0 <= rx < width:
-                    ch[rx] = rc
-                if r == 0 or r == ROWS - 1:
-                    for cx in range(lx + 1, min(rx, width)):
-                        ch[cx] = "─"
-                else:
-                    mark_x = lx + 2
-                    line_start = mark_x + 2
-                    line_end = rx - 1
-                    if 0 <= mark_x < width:
-                        ch[mark_x] = "✓" if r <= 3 else "·"
-                    for cx in range(line_start, min(line_end, width)):
-                        ch[cx] = "─"
+            decor = _MORPH_DECOR.get(morph_style, _checklist_decor)
+            marks, decor_spans = decor(r, lx, rx)
+            for x, c in marks:
+                if 0 <= x < width:
+                    ch[x] = c
         else:
+            decor_spans = ()
             if 0 <= lx < width:
                 ch[lx] = _strand_char(ldx, lz)
             if 0 <= rx < width:
                 ch[rx] = _strand_char(rdx, rz)
 
-        ln = Text("".join(ch))
-
-        if morph > 0.9:
-            if morph_style == "smiley":
-                if r == 2:
-                    le = lx + (rx - lx) // 3
-                    re = rx - (rx - lx) // 3
-                    for ep in (le, re):
-                        if 0 <= ep < width:
-                            ln.stylize("bold bright_cyan", ep, ep + 1)
-                elif r == 3:
-                    mid = (lx + rx) // 2
-                    if 0 <= mid < width:
-                        ln.stylize("bold bright_cyan", mid, mid + 1)
-            elif 1 <= r <= ROWS - 2:
-                mark_x = lx + 2
-                line_start = mark_x + 2
-                line_end = rx - 1
-                if 0 <= mark_x < width:
-                    style = "bold bright_green" if r <= 3 else "dim cyan"
-                    ln.stylize(style, mark_x, mark_x + 1)
-                if line_start < min(line_end, width):
-                    ln.stylize("dim", line_start, min(line_end, width))
-
-        for pos, z, c in [(lx, lz, "green"), (rx, rz, "cyan")]:
+        spans = [
+            Span(start, min(end, width), style)
+            for start, end, style in decor_spans
+            if 0 <= start < width and start < end
+        ]
+        for pos, z, c in ((lx, lz, "green"), (rx, rz, "cyan")):
             if 0 <= pos < width:
                 if morph > 0.9:
-                    ln.stylize("bold bright_green", pos, pos + 1)
-                elif z > 0.2:
-                    ln.stylize(f"bold bright_{c}", pos, pos + 1)
-                elif z > -0.2:
-                    ln.stylize(c, pos, pos + 1)
+                    style = _S_MORPHED
                 else:
-                    ln.stylize(f"dim {c}", pos, pos + 1)
+                    front, side, back = _STRAND_STYLES[c]
+                    style = front if z > 0.2 else (side if z > -0.2 else back)
+                spans.append(Span(pos, pos + 1, style))
 
-        lines.append(ln)
-    return lines
+        lines.append(("".join(ch), tuple(spans)))
+    return tuple(lines)
 
 
 def _build_banner(helix_lines: list[Text]) -> Table:
@@ -181,100 +213,126 @@ def _build_banner(helix_lines: list[Text]) -> Table:
     tbl.add_column()  # title
     tbl.add_column()  # helix
     for i in range(max(len(TITLE_LINES), len(helix_lines))):
-        title_ln = Text.from_markup(TITLE_LINES[i]) if i < len(TITLE_LINES) else Text("")
+        title_ln = _TITLE_TEXTS[i] if i < len(_TITLE_TEXTS) else Text("")
         helix_ln = helix_lines[i] if i < len(helix_lines) else Text("")
         tbl.add_row(title_ln, helix_ln)
     return tbl
 
 
+def _banner_for(frame: int, morph: float = 0.0, morph_style: str = "checklist") -> Table:
+    """Banner for helix frame `frame`, reusing the Table built for the same frame."""
+    return _banner_table(frame % _PERIOD, max(0.0, min(1.0, morph)), morph_style)
+
+
+@lru_cache(maxsize=512)
+def _banner_table(f: int, morph: float, morph_style: str) -> Table:
+    # Rendering a Table doesn't mutate it, so one instance can back every
+    # repeat of a frame.
+    return _build_banner(_helix_frame(f, morph, morph_style))
+
+
+_FPS = 15
+_MORPH_FRAMES = 15  # 1s morph into the smiley
+_HOLD_FRAMES = 15  # then 1s hold before Live stops
+
+
+def _phase_line(phase: str, elapsed: float) -> Text:
+    line = Text()
+    line.append("  + ", style="green")
+    line.append(phase, style="dim")
+    line.append(f" ({elapsed:.1f}s)", style="dim")
+    return line
+
+
+@dataclass(frozen=True)
+class _SpinnerState:
+    """Everything a frame shows; replaced wholesale, never mutated."""
+
+    phase: str = ""
+    phase_start: float = 0.0
+    completed: tuple[Text, ...] = ()
+    finished_at: Optional[float] = None
+    # Everything under the banner once finished, built once in __exit__.
+    exit_tail: tuple[Text, ...] = ()
+
+
 class HelixSpinner:
-    """Context manager: animated helix + timed phase log via Rich Live."""
+    """Context manager: animated helix + timed phase log via Rich Live.
+
+    Live's refresh thread pulls each frame from _render; the frame number
+    comes from the clock, so there is no render thread or lock of our own.
+    """
 
     def __init__(self, console: Console, subtitle: str = ""):
         self._console = console
         self._subtitle = subtitle
-        self._stop = threading.Event()
-        self._phase = ""
-        self._phase_start = 0.0
+        self._subtitle_text = Text.from_markup(f"[bold]{subtitle}[/bold]")
         self._total_start = 0.0
-        self._completed: list[Text] = []
-        self._lock = threading.Lock()
-        self._frame_count = 0
+        # Swapped as a single reference, so the refresh thread always
+        # sees a consistent snapshot.
+        self._state = _SpinnerState()
 
     def set_phase(self, phase: str) -> None:
-        with self._lock:
-            now = time.monotonic()
-            if self._phase:
-                elapsed = now - self._phase_start
-                line = Text()
-                line.append("  + ", style="green")
-                line.append(self._phase, style="dim")
-                line.append(f" ({elapsed:.1f}s)", style="dim")
-                self._completed.append(line)
-            self._phase = phase
-            self._phase_start = now
+        now = time.monotonic()
+        state = self._state
+        completed = state.completed
+        if state.phase:
+            completed += (_phase_line(state.phase, now - state.phase_start),)
+        self._state = _SpinnerState(phase=phase, phase_start=now, completed=completed)
 
     def __enter__(self):
         self._total_start = time.monotonic()
-        self._live = Live(console=self._console, refresh_per_second=15)
+        self._live = Live(
+            console=self._console,
+            get_renderable=self._render,
+            refresh_per_second=_FPS,
+        )
         self._live.start()
-        self._thread = threading.Thread(target=self._loop, daemon=True)
-        self._thread.start()
         return self
 
     def __exit__(self, *_):
-        self._stop.set()
-        self._thread.join()
-        with self._lock:
-            if self._phase:
-                elapsed = time.monotonic() - self._phase_start
-                line = Text()
-                line.append("  + ", style="green")
-                line.append(self._phase, style="dim")
-                line.append(f" ({elapsed:.1f}s)", style="dim")
-                self._completed.append(line)
-                self._phase = ""
-            completed = list(self._completed)
-        total = time.monotonic() - self._total_start
-
-        # Play morph-to-cell animation (1s morph + 1s hold)
-        morph_frames = 15
-        hold_frames = 15
-        phase = self._frame_count * 0.18
-        for f in range(morph_frames + hold_frames):
-            morph = min(1.0, f / morph_frames)
-            helix = _helix_frame(phase + f * 0.18, morph=morph, morph_style="smiley")
-            banner = _build_banner(helix)
-            parts: list = [banner, Text("")]
-            parts.extend(completed)
-            parts.append(Text.from_markup(f"  [dim]Setup complete in {total:.1f}s[/dim]"))
-            self._live.update(Group(*parts))
-            time.sleep(1 / 15)
-
-        # Stop Live — the last rendered frame stays on screen
+        now = time.monotonic()
+        state = self._state
+        completed = state.completed
+        if state.phase:
+            completed += (_phase_line(state.phase, now - state.phase_start),)
+        total = now - self._total_start
+        summary = Text.from_markup(f"  [dim]Setup complete in {total:.1f}s[/dim]")
+        self._state = _SpinnerState(
+            completed=completed,
+            finished_at=now,
+            exit_tail=(Text(""), *completed, summary),
+        )
+
+        # Let the morph-to-smiley animation play out, then stop Live —
+        # its final refresh leaves the last frame on screen.
+        time.sleep((_MORPH_FRAMES + _HOLD_FRAMES) / _FPS)
         self._live.stop()
 
-    def _loop(self):
-        frame = 0
-        while not self._stop.wait(1 / 15):
-            helix = _helix_frame(frame * 0.18)
-            banner = _build_banner(helix)
-            with self._lock:
-                parts = [banner]
-                if self._subtitle:
-                    parts.append(Text(""))
-                    parts.append(Text.from_markup(f"[bold]{self._subtitle}[/bold]"))
-                    parts.append(Text.from_markup("[dim]Type 'exit' or Ctrl+C to quit[/dim]"))
-                parts.append(Text(""))
-                parts.extend(list(self._completed))
-                if self._phase:
-                    elapsed = time.monotonic() - self._phase_start
-                    sp = SPINNER[frame % len(SPINNER)]
-                    cur = Text()
-                    cur.append(f"  {sp} ", style="cyan")
-                    cur.append(self._phase, style="dim")
-                    cur.append(f" ({elapsed:.1f}s)", style="dim bold")
-                    parts.append(cur)
-            self._live.update(Group(*parts))
-            frame += 1
-        self._frame_count = frame
+    def _render(self) -> Group:
+        state = self._state
+        now = time.monotonic()
+        frame = int((now - self._total_start) * _FPS)
+
+        if state.finished_at is not None:
+            # Whole morph steps, so the exit animation hits the banner cache.
+            step = min(_MORPH_FRAMES, int((now - state.finished_at) * _FPS))
+            banner = _banner_for(frame, morph=step / _MORPH_FRAMES, morph_style="smiley")
+            return Group(banner, *state.exit_tail)
+
+        parts = [_banner_for(frame)]
+        if self._subtitle:
+            parts.append(Text(""))
+            parts.append(self._subtitle_text)
+            parts.append(_HINT_TEXT)
+        parts.append(Text(""))
+        parts.extend(state.completed)
+        if state.phase:
+            elapsed = now - state.phase_start
+            sp = SPINNER[frame % len(SPINNER)]
+            cur = Text()
+            cur.append(f"  {sp} ", style="cyan")
+            cur.append(state.phase, style="dim")
+            cur.append(f" ({elapsed:.1f}s)", style="dim bold")
+            parts.append(cur)
+        return Group(*parts)
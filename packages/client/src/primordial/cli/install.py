@@ -2,9 +2,11 @@
 
 import os
 import secrets
+import shlex
 import shutil
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 
 import click
@@ -28,26 +30,38 @@ _OPENCLAW_SKILL_DEST = Path.home() / ".openclaw" / "workspace" / "skills" / "pri
 _CLAUDE_SKILL_DEST = Path.home() / ".claude" / "skills" / "primordial"
 
 
+def _atomic_write(path: Path, data: str, mode: int) -> None:
+    """Write via a temp file that already has its final mode, then rename.
+
+    Readers never see a partial file, and a secret is never on disk with
+    default permissions.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as f:
+        try:
+            os.fchmod(f.fileno(), mode)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
 def _find_real_binary() -> str:
     """Find the real primordial binary path."""
-    result = subprocess.run(
-        ["which", "primordial"], capture_output=True, text=True
-    )
-    path = result.stdout.strip()
-    if path and Path(path).exists():
+    path = shutil.which("primordial")
+    if path:
         # If it's already our wrapper, find the pip-installed one
         if path == str(_WRAPPER_PATH):
             # Search PATH excluding our wrapper dir
-            env = os.environ.copy()
             path_dirs = [
-                d for d in env.get("PATH", "").split(":")
+                d for d in os.environ.get("PATH", "").split(os.pathsep)
                 if d != str(_WRAPPER_DIR)
             ]
-            env["PATH"] = ":".join(path_dirs)
-            result = subprocess.run(
-                ["which", "primordial"], capture_output=True, text=True, env=env
-            )
-            return result.stdout.strip()
+            return shutil.which("primordial", path=os.pathsep.join(path_dirs)) or ""
         return path
     return "primordial"
 
@@ -60,28 +74,24 @@ def _get_or_create_password() -> tuple[str, bool]:
     if _PASSWORD_FILE.exists():
         return _PASSWORD_FILE.read_text().strip(), False
     password = secrets.token_urlsafe(32)
-    _PASSWORD_FILE.write_text(password)
-    _PASSWORD_FILE.chmod(0o600)
+    _atomic_write(_PASSWORD_FILE, password, 0o600)
     return password, True
 
 
 def _create_wrapper(real_binary: str, password: str):
     """Create a wrapper script that sets vault password before exec.
 
-    Skips if the wrapper already exists with the same binary path.
+    Skips if the wrapper already exists with identical content.
     """
-    if _WRAPPER_PATH.exists():
-        existing = _WRAPPER_PATH.read_text()
-        if f'exec "{real_binary}"' in existing and f"'{password}'" in existing:
-            return False  # No change needed
-
-    _WRAPPER_DIR.mkdir(parents=True, exist_ok=True)
     script = f"""#!/bin/sh
-export PRIMORDIAL_VAULT_PASSWORD='{password}'
-exec "{real_binary}" "$@"
+export PRIMORDIAL_VAULT_PASSWORD={shlex.quote(password)}
+exec {shlex.quote(real_binary)} "$@"
 """
-    _WRAPPER_PATH.write_text(script)
-    _WRAPPER_PATH.chmod(0o755)
+    if _WRAPPER_PATH.exists() and _WRAPPER_PATH.read_text() == script:
+        return False  # No change needed
+
+    _WRAPPER_DIR.mkdir(parents=True, exist_ok=True)
+    _atomic_write(_WRAPPER_PATH, script, 0o755)
     return True
 
 
@@ -119,14 +129,38 @@ def _create_plist():
 
         subprocess.run(
             ["launchctl", "unload", str(_PLIST_PATH)],
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
 
-    _PLIST_PATH.write_text(new_content)
+    _atomic_write(_PLIST_PATH, new_content, 0o644)
     subprocess.run(["launchctl", "load", str(_PLIST_PATH)], check=True)
     return True
 
 
+def _restart_daemon() -> bool:
+    """Restart the daemon so it re-execs the wrapper.
+
+    kickstart -k is a single launchctl call; the job definition is unchanged,
+    so there is nothing for unload+load to re-register. If the job isn't
+    loaded (e.g. after a manual unload) kickstart fails, so load the plist
+    instead. Returns whether the daemon is now running the new wrapper.
+    """
+    result = subprocess.run(
+        ["launchctl", "kickstart", "-k", f"gui/{os.getuid()}/{_PLIST_LABEL}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode == 0:
+        return True
+    result = subprocess.run(
+        ["launchctl", "load", str(_PLIST_PATH)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
 def _install_skill(name: str, dest: Path, source_name: str):
     """Copy a skill file to the destination."""
     source = _SKILL_DIR / source_name
@@ -146,7 +180,7 @@ def _prompt_e2b_key():
     config = get_config()
     vault = KeyVault(config.keys_file)
 
-    if vault.get_key("e2b"):
+    if vault.has_key("e2b"):
         console.print("  [dim]e2b key already configured.[/dim]")
         return
 
@@ -200,8 +234,8 @@ def install(openclaw: bool, claude: bool, codex: bool, install_all: bool):
 
     # 2. Wrapper script (idempotent)
     console.print("[bold]2.[/bold] Wrapper script...")
-    changed = _create_wrapper(real_binary, password)
-    if changed:
+    wrapper_changed = _create_wrapper(real_binary, password)
+    if wrapper_changed:
         console.print(f"  [green]Created →[/green] {_WRAPPER_PATH}")
     else:
         console.print(f"  [dim]Already up to date →[/dim] {_WRAPPER_PATH}")
@@ -212,6 +246,16 @@ def install(openclaw: bool, claude: bool, codex: bool, install_all: bool):
         changed = _create_plist()
         if changed:
             console.print(f"  [green]Loaded →[/green] {_PLIST_PATH}")
+        elif wrapper_changed:
+            # Same job, new wrapper: the running daemon still has the old
+            # binary path / password until it restarts.
+            if _restart_daemon():
+                console.print(f"  [green]Restarted →[/green] {_PLIST_PATH}")
+            else:
+                console.print(
+                    f"  [yellow]Could not restart the daemon; it may still use the old "
+                    f"wrapper. Try: launchctl load {_PLIST_PATH}[/yellow]"
+                )
         else:
             console.print(f"  [dim]Already up to date →[/dim] {_PLIST_PATH}")
     else:
@@ -1,33 +1,34 @@
 """Primordial AgentStore CLI - main entry point."""
 
+import importlib
+
 import click
 
-from primordial.cli.cache import cache
-from primordial.cli.install import install
-from primordial.cli.search import search
-from primordial.cli.keys import keys
-from primordial.cli.run import run
-from primordial.cli.serve import serve
-from primordial.cli.sessions import sessions
-from primordial.cli.setup import setup
+# Subcommand name -> module in primordial.cli defining a same-named command.
+# Imported on first use, so running one command doesn't load the others
+# (sandbox SDK, key vault, HTTP server, ...).
+_SUBCOMMANDS = ("setup", "run", "serve", "sessions", "install", "keys", "cache", "search")
+
+
+class LazyGroup(click.Group):
+    """Click group that imports subcommand modules only when invoked."""
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(_SUBCOMMANDS)
 
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in _SUBCOMMANDS:
+            return None
+        module = importlib.import_module(f"primordial.cli.{cmd_name}")
+        return getattr(module, cmd_name)
 
-@click.group()
+
+@click.group(cls=LazyGroup)
 @click.version_option(version="0.3.0", prog_name="primordial")
 def cli():
     """Primordial AgentStore - The digital soup from which agents emerge."""
     pass
 
 
-cli.add_command(setup)
-cli.add_command(run)
-cli.add_command(serve)
-cli.add_command(sessions)
-cli.add_command(install)
-cli.add_command(keys)
-cli.add_command(cache)
-cli.add_command(search)
-
-
 if __name__ == "__main__":
     cli()
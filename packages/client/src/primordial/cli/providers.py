@@ -19,16 +19,16 @@ def pick_provider(
     """
     existing = vault.list_keys()
 
-    console.print()
-
+    # One print for the whole menu: a single markup parse and terminal write.
+    lines = [""]
     if existing:
         for i, entry in enumerate(existing, 1):
-            console.print(f"  [cyan]{i:>2}[/cyan]  {entry['provider']:<12} [green]stored[/green]")
+            lines.append(f"  [cyan]{i:>2}[/cyan]  {entry['provider']:<12} [green]stored[/green]")
     else:
-        console.print("  [dim]No API keys stored yet.[/dim]")
-
-    console.print(f"  [cyan] +[/cyan]  [dim]Add a new key[/dim]")
-    console.print()
+        lines.append("  [dim]No API keys stored yet.[/dim]")
+    lines.append("  [cyan] +[/cyan]  [dim]Add a new key[/dim]")
+    lines.append("")
+    console.print("\n".join(lines))
 
     choice = click.prompt(
         "Pick a number to update, + to add, Enter to finish",
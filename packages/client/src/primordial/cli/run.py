@@ -4,7 +4,6 @@ import json
 import math
 import os
 import select
-import subprocess
 import sys
 import uuid
 from datetime import datetime
@@ -15,13 +14,14 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.text import Text
 
+from primordial import ndjson
 from primordial.config import get_config
 from primordial.github import GitHubResolver, GitHubResolverError, is_github_url, parse_github_url
 from primordial.manifest import load_manifest
 from primordial.security.key_vault import KeyVault
 from primordial.security.permissions import format_permissions_for_display
 from primordial.sandbox.manager import SandboxManager
-from primordial.cli.helix import HelixSpinner
+from primordial.cli.helix import HelixSpinner, _strand_char
 
 console = Console()
 
@@ -66,14 +66,11 @@ def _detect_host_tz() -> str | None:
     if tz := os.environ.get("TZ"):
         return tz
     try:
-        out = subprocess.run(
-            ["readlink", "/etc/localtime"],
-            capture_output=True, text=True, timeout=3,
-        ).stdout.strip()
-        if "/zoneinfo/" in out:
-            return out.split("/zoneinfo/")[1]
-    except Exception:
-        pass
+        out = os.readlink("/etc/localtime")
+    except OSError:
+        return None
+    if "/zoneinfo/" in out:
+        return out.split("/zoneinfo/")[1]
     return None
 
 
@@ -189,7 +186,7 @@ def run(
     vault = KeyVault(config.keys_file)
 
     # E2B key is always required for sandbox runtime
-    if not vault.get_key("e2b"):
+    if not vault.has_key("e2b"):
         if agent_mode:
             console.print(
                 "Missing API key: e2b (E2B_API_KEY)\n"
@@ -237,7 +234,7 @@ def run(
         missing_required = []
         missing_optional = []
         for key_req in manifest.keys:
-            if not vault.get_key(key_req.provider):
+            if not vault.has_key(key_req.provider):
                 if key_req.required:
                     missing_required.append(key_req)
                 else:
@@ -331,15 +328,6 @@ _MINI_WIDTH = _MINI_CENTER * 2 + 2
 _MINI_SPINNER = "/-\\|"
 
 
-def _mini_strand_char(dx: float, z: float) -> str:
-    """Pick strand character based on visual slope and depth."""
-    if abs(dx) < 0.12:
-        return "|" if z > 0 else ":"
-    if dx > 0:
-        return "\\" if z > -0.2 else "."
-    return "/" if z > -0.2 else "."
-
-
 def _mini_helix_frame(phase: float) -> list[Text]:
     """Render one frame of a mini double helix (3 rows)."""
     lines = []
@@ -359,7 +347,7 @@ def _mini_helix_frame(phase: float) -> list[Text]:
             cx = min(x1, x2)
             if 0 <= cx < _MINI_WIDTH:
                 front_dx = dx1 if hz1 > 0 else dx2
-                ch[cx] = _mini_strand_char(front_dx, 0.5)
+                ch[cx] = _strand_char(front_dx, 0.5)
             ln = Text("".join(ch))
             if 0 <= cx < _MINI_WIDTH:
                 ln.stylize("bright_green", cx, cx + 1)
@@ -373,9 +361,9 @@ def _mini_helix_frame(phase: float) -> list[Text]:
         rdx = dx2 if x1 < x2 else dx1
 
         if 0 <= lx < _MINI_WIDTH:
-            ch[lx] = _mini_strand_char(ldx, lz)
+            ch[lx] = _strand_char(ldx, lz)
         if 0 <= rx < _MINI_WIDTH:
-            ch[rx] = _mini_strand_char(rdx, rz)
+            ch[rx] = _strand_char(rdx, rz)
 
         ln = Text("".join(ch))
         for pos, z, c in [(lx, lz, "green"), (rx, rz, "cyan")]:
@@ -513,7 +501,7 @@ def _show_sub_spawn(console: Console, session, sid: str, first_status: str) -> N
             msg = session.receive(timeout=0.1)
             if msg is not None:
                 if not _process_msg(msg):
-                    session._messages.put(msg)
+                    session.put_back(msg)
 
     frame = 0
     while True:
@@ -541,7 +529,7 @@ def _show_sub_spawn(console: Console, session, sid: str, first_status: str) -> N
                 if msg is not None:
                     if not _process_msg(msg):
                         # Non-setup event — put it back and exit
-                        session._messages.put(msg)
+                        session.put_back(msg)
                         if handler:
                             handler.on_input_needed = _prev_input_needed
                             handler.on_input_done = _prev_input_done
@@ -871,12 +859,13 @@ def _run_agent(
 
         _json_line({"type": "ready"})
 
+        # Stay on the text stream: the approval prompt above read through
+        # it, so its buffer may already hold the first messages.
         for line in sys.stdin:
-            line = line.strip()
-            if not line:
+            if line.isspace():
                 continue
             try:
-                incoming = json.loads(line)
+                incoming = ndjson.loads(line)
             except json.JSONDecodeError:
                 continue
 
@@ -909,6 +898,8 @@ def _run_agent(
 
 
 def _json_line(data: dict) -> None:
-    """Write a single NDJSON line to stdout."""
-    sys.stdout.write(json.dumps(data) + "\n")
+    """Write a single NDJSON line to stdout, as UTF-8 whatever the locale."""
+    # Flush the text layer first so earlier output stays in order.
     sys.stdout.flush()
+    sys.stdout.buffer.write(ndjson.dumps_bytes(data))
+    sys.stdout.buffer.flush()
@@ -6,6 +6,7 @@ so hosts like OpenClaw can interact without managing child processes.
 
 import json
 import logging
+import os
 import secrets
 import uuid
 from http.server import HTTPServer, BaseHTTPRequestHandler
@@ -15,6 +16,7 @@ from threading import Lock
 import click
 from rich.console import Console
 
+from primordial import ndjson
 from primordial.config import get_config
 from primordial.github import GitHubResolver, GitHubResolverError, is_github_url, parse_github_url
 from primordial.manifest import load_manifest
@@ -47,8 +49,14 @@ _daemon_token: str = ""
 def _generate_daemon_token() -> str:
     """Generate a random bearer token and write to ~/.primordial-daemon-token."""
     token = secrets.token_urlsafe(32)
-    _TOKEN_FILE.write_text(token)
-    _TOKEN_FILE.chmod(0o600)
+    # Create with 0600 and write in one call, so the token is never on
+    # disk with umask permissions (fchmod covers a pre-existing file).
+    fd = os.open(_TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.fchmod(fd, 0o600)
+        os.write(fd, token.encode())
+    finally:
+        os.close(fd)
     return token
 
 
@@ -165,11 +173,11 @@ class DaemonHandler(BaseHTTPRequestHandler):
         vault = KeyVault(config.keys_file)
 
         missing = []
-        if not vault.get_key("e2b"):
+        if not vault.has_key("e2b"):
             missing.append("e2b")
         if manifest.keys:
             for kr in manifest.keys:
-                if kr.required and not vault.get_key(kr.provider):
+                if kr.required and not vault.has_key(kr.provider):
                     missing.append(kr.provider)
         if missing:
             providers = ", ".join(missing)
@@ -248,9 +256,8 @@ class DaemonHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
         def _send_chunk(data: dict):
-            line = json.dumps(data) + "\n"
-            chunk = f"{len(line.encode()):x}\r\n{line}\r\n"
-            self.wfile.write(chunk.encode())
+            line = ndjson.dumps_bytes(data)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
             self.wfile.flush()
 
         while True:
@@ -280,15 +287,22 @@ class DaemonHandler(BaseHTTPRequestHandler):
             _respond_error(self, f"Unknown session: {session_id}", 404)
             return
 
-        entry.session.shutdown()
+        # Reply only once the session state is saved.
+        entry.session.shutdown().result()
         _respond_json(self, {"ok": True})
 
 
 @click.command()
 @click.option("--port", default=DEFAULT_PORT, help="Port to listen on")
-def serve(port: int):
+@click.option(
+    "--warm-pool", default=0, type=click.IntRange(min=0),
+    help="Keep this many pre-created sandboxes warm per agent config",
+)
+def serve(port: int, warm_pool: int):
     """Start the Primordial HTTP daemon for host agent integration."""
-    global _daemon_token
+    global _daemon_token, _manager
+    if warm_pool:
+        _manager = SandboxManager(pool_size=warm_pool)
     _daemon_token = _generate_daemon_token()
     console.print(f"[dim]Auth token written to {_TOKEN_FILE}[/dim]")
 
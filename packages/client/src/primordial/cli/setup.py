@@ -13,7 +13,7 @@ from rich.text import Text
 from primordial.config import get_config
 from primordial.security.key_vault import KeyVault
 from primordial.cli.providers import pick_provider
-from primordial.cli.helix import _helix_frame, _build_banner
+from primordial.cli.helix import _banner_for
 
 console = Console()
 
@@ -23,7 +23,7 @@ def _print_banner() -> None:
     morph_start = 15   # 1s helix, then morph
     morph_end = 30
     hold_end = 45      # 1s hold
-    with Live(console=console, refresh_per_second=15) as live:
+    with Live(console=console, auto_refresh=False) as live:
         for frame in range(hold_end):
             if frame < morph_start:
                 morph = 0.0
@@ -31,9 +31,7 @@ def _print_banner() -> None:
                 morph = (frame - morph_start) / (morph_end - morph_start)
             else:
                 morph = 1.0
-            helix = _helix_frame(frame * 0.18, morph=morph)
-            banner = _build_banner(helix)
-            live.update(Group(Text(""), banner))
+            live.update(Group(Text(""), _banner_for(frame, morph=morph)), refresh=True)
             time.sleep(1 / 15)
     console.print()
 
@@ -84,7 +82,7 @@ def _setup_for_agent(agent_url: str):
     missing = []
     present = []
     for provider in sorted(all_providers):
-        if vault.get_key(provider):
+        if vault.has_key(provider):
             present.append(provider)
         else:
             # Check if required (e2b is always required)
@@ -9,6 +9,7 @@ import shutil
 import subprocess
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -19,7 +20,7 @@ class GitHubResolverError(Exception):
     pass
 
 
-@dataclass
+@dataclass(frozen=True)
 class GitHubRef:
     """Parsed GitHub repository reference."""
 
@@ -63,6 +64,7 @@ def is_github_url(value: str) -> bool:
     return any(p.search(value) for p in _GITHUB_PATTERNS)
 
 
+@lru_cache(maxsize=256)
 def parse_github_url(url: str, ref_override: Optional[str] = None) -> GitHubRef:
     """Parse a GitHub URL into components.
 
@@ -129,6 +131,12 @@ def parse_github_url(url: str, ref_override: Optional[str] = None) -> GitHubRef:
 _SEMVER_TAG = re.compile(r"^v?\d+\.\d+")
 
 
+@lru_cache(maxsize=1)
+def _find_git() -> Optional[str]:
+    """Locate the git binary once per process."""
+    return shutil.which("git")
+
+
 class GitHubResolver:
     """Resolves GitHub repos to local cached directories."""
 
@@ -139,6 +147,7 @@ class GitHubResolver:
         self._cache_dir = cache_dir or (config.cache_dir / "repos")
         self._quiet = quiet
         self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._git = "git"
 
     def resolve(
         self,
@@ -195,7 +204,7 @@ class GitHubResolver:
         for entry in sorted(self._cache_dir.iterdir()):
             meta_path = entry / self.META_FILE
             if entry.is_dir() and meta_path.exists():
-                meta = json.loads(meta_path.read_text())
+                meta = json.loads(meta_path.read_bytes())
                 age = time.time() - meta.get("cloned_at", 0)
                 meta["age_seconds"] = round(age)
                 meta["path"] = str(entry)
@@ -213,7 +222,7 @@ class GitHubResolver:
         meta_path = cache_path / self.META_FILE
         if not meta_path.exists():
             return None
-        meta = json.loads(meta_path.read_text())
+        meta = json.loads(meta_path.read_bytes())
         return time.time() - meta.get("cloned_at", 0)
 
     @staticmethod
@@ -228,14 +237,14 @@ class GitHubResolver:
         return f"{hours / 24:.1f}d"
 
     def _check_git(self) -> None:
-        try:
-            subprocess.run(
-                ["git", "--version"], capture_output=True, text=True, timeout=5
-            )
-        except FileNotFoundError:
+        # Later argv use the absolute path so exec doesn't walk $PATH on
+        # every clone/fetch/reset.
+        git = _find_git()
+        if git is None:
             raise GitHubResolverError(
                 "git is not installed. Install git to run agents from GitHub URLs."
             )
+        self._git = git
 
     def _has_metadata(self, cache_path: Path) -> bool:
         return (cache_path / self.META_FILE).exists()
@@ -244,14 +253,14 @@ class GitHubResolver:
         meta_path = cache_path / self.META_FILE
         if not meta_path.exists():
             return True
-        meta = json.loads(meta_path.read_text())
+        meta = json.loads(meta_path.read_bytes())
         return (time.time() - meta.get("cloned_at", 0)) > max_age
 
     def _clone(self, github_ref: GitHubRef, target: Path) -> None:
         if target.exists():
             shutil.rmtree(target)
 
-        cmd = ["git", "clone", "--depth", "1"]
+        cmd = [self._git, "clone", "--depth", "1"]
         if github_ref.ref:
             cmd.extend(["--branch", github_ref.ref])
         cmd.extend([github_ref.clone_url, str(target)])
@@ -279,15 +288,19 @@ class GitHubResolver:
     def _refresh(self, github_ref: GitHubRef, cache_path: Path) -> None:
         """Update an existing clone by fetching latest."""
         ref = github_ref.ref or "HEAD"
-        fetch_cmd = ["git", "-C", str(cache_path), "fetch", "--depth", "1", "origin", ref]
-        result = subprocess.run(fetch_cmd, capture_output=True, text=True, timeout=60)
+        fetch_cmd = [self._git, "-C", str(cache_path), "fetch", "--depth", "1", "origin", ref]
+        result = subprocess.run(
+            fetch_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60
+        )
         if result.returncode != 0:
             # Fetch failed — fall back to full re-clone
             self._clone(github_ref, cache_path)
             return
 
-        reset_cmd = ["git", "-C", str(cache_path), "reset", "--hard", "FETCH_HEAD"]
-        subprocess.run(reset_cmd, capture_output=True, text=True, timeout=30)
+        reset_cmd = [self._git, "-C", str(cache_path), "reset", "--hard", "FETCH_HEAD"]
+        subprocess.run(
+            reset_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30
+        )
         self._write_metadata(github_ref, cache_path)
 
     def _write_metadata(self, github_ref: GitHubRef, cache_path: Path) -> None:
@@ -299,7 +312,7 @@ class GitHubResolver:
             "cloned_at": time.time(),
             "cache_key": github_ref.cache_key,
         }
-        (cache_path / self.META_FILE).write_text(json.dumps(meta, indent=2))
+        (cache_path / self.META_FILE).write_text(json.dumps(meta))
 
     def _find_agent_dir(self, cache_path: Path, subdirectory: Optional[str]) -> Path:
         """Locate the directory containing agent.yaml."""
@@ -32,9 +32,17 @@ class RuntimeConfig(BaseModel):
     setup_command: Optional[str] = None
     run_command: Optional[str] = None
     mode: str = "agent"  # "agent" (NDJSON protocol) or "terminal" (raw PTY passthrough)
+    template: str = "base"  # E2B template; a pre-built one can bake in setup_command's work
     default_model: ModelConfig = Field(default_factory=ModelConfig)
     resources: ResourceLimits = Field(default_factory=ResourceLimits)
 
+    @field_validator("template")
+    @classmethod
+    def validate_template(cls, v: str) -> str:
+        if not re.match(r"^[A-Za-z0-9][A-Za-z0-9._/:-]*$", v):
+            raise ValueError(f"Invalid template: {v!r} — must be an E2B template name or ID")
+        return v
+
 
 class NetworkPermission(BaseModel):
     domain: str
@@ -0,0 +1,119 @@
+"""NDJSON encode/decode for the agent protocol.
+
+Uses orjson when it is installed (``pip install primordial[speedups]``)
+and falls back to the stdlib json module otherwise. Decode errors are
+always ``json.JSONDecodeError`` (orjson's error subclasses it).
+
+The backends accept the same input and decode it to the same values:
+orjson handles the common case, and anything it rejects or can't
+represent exactly goes through the stdlib json module. That covers
+integers beyond 64 bits (orjson reads them as floats), NaN/Infinity, and
+lone surrogates (which Python's json.dumps emits by default).
+
+Encoded output is compact and UTF-8 with either backend, but it is not
+byte-identical. Float spelling can differ (orjson writes ``1e-7`` where
+the stdlib writes ``1e-07``), which decodes to the same value. NaN and
+Infinity encode as ``null`` with orjson but as ``NaN``/``Infinity`` with
+the stdlib.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_ascii_encoder = json.JSONEncoder(separators=(",", ":"))
+_SURROGATE = re.compile("[\ud800-\udfff]")
+# Shortest digit run that can fall outside orjson's integer range
+# (-9223372036854775809 has 19 digits).
+_LONG_DIGITS = re.compile(r"\d{19}")
+
+
+def _std_dumps_line(obj: Any) -> str:
+    line = _encoder.encode(obj)
+    if not line.isascii() and _SURROGATE.search(line):
+        # Lone surrogates have no UTF-8 form; escape them as \uXXXX.
+        line = _ascii_encoder.encode(obj)
+    return line + "\n"
+
+
+if orjson is not None:
+
+    def dumps_line(obj: Any) -> str:
+        """Serialize obj as a single NDJSON line, trailing newline included."""
+        return dumps_bytes(obj).decode()
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Like dumps_line, but UTF-8 bytes for writing to binary streams."""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and lone surrogates; anything else
+            # fails in the stdlib encoder too.
+            return _std_dumps_line(obj).encode()
+
+    def loads(data: str) -> Any:
+        """Parse one JSON document."""
+        if _LONG_DIGITS.search(data):
+            return json.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity, out-of-range floats, lone surrogates; truly
+            # invalid input raises from the stdlib as well.
+            return json.loads(data)
+
+else:
+
+    def dumps_line(obj: Any) -> str:
+        """Serialize obj as a single NDJSON line, trailing newline included."""
+        return _std_dumps_line(obj)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Like dumps_line, but UTF-8 bytes for writing to binary streams."""
+        return _std_dumps_line(obj).encode()
+
+    loads = json.loads
+
+
+class StreamDecoder:
+    """Decodes NDJSON messages from text that arrives in arbitrary chunks.
+
+    A line split across chunks is held until the chunk that completes it
+    arrives. Blank lines, lines that aren't valid JSON and JSON values
+    that aren't objects (every protocol message is one) are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._partial: list[str] = []
+
+    def feed(self, data: str) -> list[dict[str, Any]]:
+        lines = data.split("\n")
+        tail = lines.pop()
+        if self._partial and lines:
+            self._partial.append(lines[0])
+            lines[0] = "".join(self._partial)
+            self._partial.clear()
+        if tail:
+            self._partial.append(tail)
+
+        messages = []
+        for line in lines:
+            # No strip: the decoder ignores surrounding whitespace itself.
+            if not line or line.isspace():
+                continue
+            try:
+                msg = loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(msg, dict):
+                messages.append(msg)
+        return messages
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import atexit
+import gzip
 import io
 import json
 import logging
@@ -9,15 +11,23 @@ import os
 import queue
 import secrets
 import tarfile
+import tempfile
 import threading
+import time
+import uuid
+from collections import deque
+from contextlib import closing
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
-from e2b import Sandbox
+from e2b import CommandExitException, Sandbox
 from e2b.sandbox.commands.command_handle import PtySize
 
+from primordial import ndjson
 from primordial.models import AgentManifest, _PROTECTED_ENV_VARS
 
 _PROXY_SCRIPT = Path(__file__).parent / "proxy_script.py"
@@ -31,12 +41,58 @@ WORKSPACE_DIR_IN_SANDBOX = "/home/user/workspace"
 # SECURITY: Allowlist for state persistence. Only these subdirectories
 # of the agent home are saved/restored between sessions. Everything else
 # (dotfiles, .config, .local, .ssh, etc.) is excluded by default.
-_STATE_ALLOW_DIRS = [
+_STATE_ALLOW_DIRS = (
     "workspace",
     "data",
     "output",
     "state",
-]
+)
+_STATE_TAR_ARGS = " ".join(f"./{d}" for d in _STATE_ALLOW_DIRS)
+_STATE_ARCHIVED_MARKER = "__primordial_state_archived__"
+# Touched once the bundle (including restored state) is extracted. Files
+# whose ctime is newer changed during the session; extraction itself sets
+# ctime, so everything restored predates it and is skipped on save.
+_STATE_BASELINE = "/tmp/_primordial_state_baseline"
+
+# SECURITY: Only pass known-safe env vars into the sandbox.
+# Allowlist approach prevents credential leakage via non-standard
+# env var names (AWS_ACCESS_KEY_ID, DATABASE_URL, etc.).
+_SAFE_ENV_ALLOWLIST = frozenset({
+    "PATH", "HOME", "USER", "SHELL", "LANG", "LC_ALL",
+    "LC_CTYPE", "TERM", "TZ", "PYTHONPATH", "NODE_PATH",
+})
+
+# 30 min timeout — delegation scenarios with nested sub-agents
+# can take several minutes just for setup.
+_SANDBOX_TIMEOUT = 1800
+
+# Host-side clutter that is never needed to run an agent. node_modules,
+# .venv, dist and build are deliberately kept: an agent may ship them.
+_UPLOAD_EXCLUDE_NAMES = frozenset({
+    ".git", "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    ".tox", ".DS_Store",
+})
+_UPLOAD_EXCLUDE_SUFFIXES = (".pyc", ".pyo")
+
+# Upload bundles stay in memory up to this size, then spill to a temp
+# file, so packing a large agent dir doesn't hold the whole archive in RAM.
+_BUNDLE_SPOOL_BYTES = 4 * 1024 * 1024
+_BUNDLE_STREAM_BUFSIZE = 1024 * 1024
+_ARCHIVE_GZIP_LEVEL = 1
+_STATE_READ_BUFSIZE = 1024 * 1024
+
+# Pause between background pool warmups so a refill doesn't burst
+# sandbox creations against the E2B API.
+_POOL_WARMUP_DELAY = 0.5
+
+# Sent to the agent's stdin on every shutdown; encoded once.
+_SHUTDOWN_FRAME = ndjson.dumps_line({"type": "shutdown"})
+
+
+@lru_cache(maxsize=None)
+def _script_source(path: Path) -> str:
+    """Proxy sources ship with the package; read each once per process."""
+    return path.read_text()
 
 
 def _shell_escape(s: str) -> str:
@@ -48,12 +104,142 @@ class SandboxError(Exception):
     pass
 
 
+def _retry(call: Callable[[], Any], what: str, tries: int = 3, base: float = 0.2) -> Any:
+    """Run an idempotent sandbox I/O call, backing off between attempts.
+
+    Raises SandboxError once every attempt has failed.
+    """
+    for attempt in range(tries):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == tries - 1:
+                raise SandboxError(f"{what} failed after {tries} attempts: {e}") from e
+            time.sleep(base * 2 ** attempt)
+
+
+def _exclude_clutter(info: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+    """tarfile filter dropping VCS metadata, caches and bytecode."""
+    name = info.name.rpartition("/")[2]
+    if name in _UPLOAD_EXCLUDE_NAMES or name.endswith(_UPLOAD_EXCLUDE_SUFFIXES):
+        return None
+    return info
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def _kill_quietly(sandbox: Sandbox) -> None:
+    try:
+        sandbox.kill()
+    except Exception:
+        pass
+
+
+class SandboxPool:
+    """Keeps freshly created sandboxes warm so runs skip the create latency.
+
+    Network policy and env are fixed at Sandbox.create time, so sandboxes
+    are pooled per exact set of create kwargs. A sandbox is handed out at
+    most once and never returned — after a session it has run agent code.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._idle: dict[str, list[Sandbox]] = {}
+        self._filling: set[str] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def acquire(self, create_kwargs: dict[str, Any]) -> Sandbox:
+        """Return a warm sandbox for these kwargs, or create one cold.
+
+        Either way, a background refill is scheduled for the key so the
+        next matching run finds a sandbox waiting.
+        """
+        key = json.dumps(create_kwargs, sort_keys=True)
+        self._schedule_fill(key, create_kwargs)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                candidate = idle.pop() if idle else None
+            if candidate is None:
+                return Sandbox.create(**create_kwargs)
+            try:
+                if candidate.is_running():
+                    # The timeout counts from creation; restart the clock.
+                    candidate.set_timeout(create_kwargs["timeout"])
+                    return candidate
+            except Exception:
+                pass
+            _kill_quietly(candidate)
+
+    def _schedule_fill(self, key: str, create_kwargs: dict[str, Any]) -> None:
+        with self._lock:
+            if self._closed or key in self._filling:
+                return
+            self._filling.add(key)
+        threading.Thread(
+            target=self._fill, args=(key, create_kwargs), daemon=True,
+        ).start()
+
+    def _fill(self, key: str, create_kwargs: dict[str, Any]) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle.get(key, ())) >= self._size:
+                        return
+                sandbox = Sandbox.create(**create_kwargs)
+                with self._lock:
+                    closed = self._closed
+                    if not closed:
+                        self._idle.setdefault(key, []).append(sandbox)
+                if closed:
+                    _kill_quietly(sandbox)
+                    return
+                time.sleep(_POOL_WARMUP_DELAY)
+        except Exception as e:
+            logger.warning("Failed to warm sandbox pool: %s", e)
+        finally:
+            with self._lock:
+                self._filling.discard(key)
+
+    def close(self) -> None:
+        """Kill every idle sandbox. Called automatically at exit."""
+        with self._lock:
+            self._closed = True
+            idle = [sb for sbs in self._idle.values() for sb in sbs]
+            self._idle.clear()
+        for sandbox in idle:
+            _kill_quietly(sandbox)
+
+
 class SandboxManager:
     """Manages E2B sandboxes for agent execution."""
 
     # Package registries that setup commands need — always allowed when
     # the agent declares a setup_command so pip/npm/etc. can fetch packages.
-    _PACKAGE_REGISTRY_DOMAINS = [
+    _PACKAGE_REGISTRY_DOMAINS = (
         # Python
         "pypi.org",
         "files.pythonhosted.org",
@@ -61,7 +247,90 @@ class SandboxManager:
         "registry.npmjs.org",
         "registry.yarnpkg.com",
         "nodejs.org",
-    ]
+    )
+
+    def __init__(self, pool_size: int = 0):
+        """pool_size > 0 keeps that many warm sandboxes per create config."""
+        self._pool = SandboxPool(pool_size) if pool_size > 0 else None
+        # Shared across sessions (including delegated sub-agents) so
+        # independent sandbox round-trips overlap instead of queueing.
+        self._executor = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="primordial-setup",
+        )
+        # Session teardown (state save + kill) runs here so shutdown()
+        # returns once the agent has been told to stop. Workers are joined
+        # at exit, so pending state saves still complete.
+        self._cleanup_pool = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="primordial-cleanup",
+        )
+        atexit.register(self._cleanup_pool.shutdown)
+        # state_dir -> its in-flight teardown; a new session on the same
+        # state waits for the save to land before packing it.
+        self._teardowns: dict[Path, Future[None]] = {}
+        self._teardowns_lock = threading.Lock()
+
+    def _schedule_teardown(
+        self, state_dir: Optional[Path], fn: Callable[..., None], *args: Any,
+    ) -> Future[None]:
+        """Run fn on the cleanup pool, tracked against state_dir until done."""
+        future = self._cleanup_pool.submit(fn, *args)
+        if state_dir:
+            with self._teardowns_lock:
+                self._teardowns[state_dir] = future
+
+            def _forget(done: Future[None]) -> None:
+                with self._teardowns_lock:
+                    if self._teardowns.get(state_dir) is done:
+                        del self._teardowns[state_dir]
+
+            future.add_done_callback(_forget)
+        return future
+
+    def _wait_for_teardown(self, state_dir: Path) -> None:
+        """Block until any pending teardown saving into state_dir finishes."""
+        with self._teardowns_lock:
+            future = self._teardowns.get(state_dir)
+        if future is not None:
+            wait([future])
+
+    def _run_parallel(self, *calls: Callable[[], Any]) -> list[Any]:
+        """Run independent setup steps concurrently, in call order.
+
+        Returns their results; re-raises the first failure without
+        waiting for the remaining steps.
+        """
+        futures = [self._executor.submit(call) for call in calls]
+        _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future.done() and future.exception() is not None:
+                for p in pending:
+                    p.cancel()
+                raise future.exception()
+        return [future.result() for future in futures]
+
+    def _prepare_sandbox(
+        self,
+        sandbox: Sandbox,
+        bundle: Future[IO[bytes]],
+        manifest: AgentManifest,
+    ) -> None:
+        """Upload agent code and restored state, and harden the sandbox.
+
+        Code and state travel as a single bundle (see _build_bundle); the
+        upload and the hardening touch disjoint parts of the sandbox, so
+        they run concurrently. Both finish before this returns.
+        """
+        def _upload() -> None:
+            archive = bundle.result()
+            try:
+                self._upload_bundle(sandbox, archive)
+            finally:
+                archive.close()
+
+        self._run_parallel(
+            _upload,
+            lambda: self._apply_hardening(sandbox, needs_proxy=bool(manifest.keys)),
+        )
 
     @staticmethod
     def _build_network_kwargs(manifest: AgentManifest) -> dict[str, Any]:
@@ -79,21 +348,19 @@ class SandboxManager:
         if perms.network_unrestricted:
             return {}
 
-        allowed = [p.domain for p in perms.network]
+        # dict keys dedupe while keeping declaration order, so the
+        # resulting kwargs (and the warm-pool key) are deterministic.
+        allowed = dict.fromkeys(p.domain for p in perms.network)
 
         # Auto-allow package registries when there's a setup command
         if manifest.runtime.setup_command:
-            for domain in SandboxManager._PACKAGE_REGISTRY_DOMAINS:
-                if domain not in allowed:
-                    allowed.append(domain)
+            allowed.update(dict.fromkeys(SandboxManager._PACKAGE_REGISTRY_DOMAINS))
 
         # Auto-allow API domains declared in key requirements.
-        for key_req in manifest.keys:
-            if key_req.domain and key_req.domain not in allowed:
-                allowed.append(key_req.domain)
+        allowed.update(dict.fromkeys(k.domain for k in manifest.keys if k.domain))
 
         if allowed:
-            return {"network": {"deny_out": ["0.0.0.0/0"], "allow_out": allowed}}
+            return {"network": {"deny_out": ["0.0.0.0/0"], "allow_out": list(allowed)}}
         return {"network": {"deny_out": ["0.0.0.0/0"]}}
 
     def _ensure_e2b_api_key(self, env_vars: dict[str, str]) -> None:
@@ -111,21 +378,96 @@ class SandboxManager:
             "Get your key at https://e2b.dev/dashboard"
         )
 
-    def _upload_directory(self, sandbox: Sandbox, local_dir: Path, remote_dir: str) -> None:
-        """Upload a local directory to the sandbox via tar."""
-        buf = io.BytesIO()
-        with tarfile.open(fileobj=buf, mode="w:gz") as tar:
-            tar.add(str(local_dir), arcname=".")
+    def _create_sandbox(self, manifest: AgentManifest, env_vars: dict[str, str]) -> Sandbox:
+        """Create (or lease from the warm pool) a sandbox for this manifest."""
+        create_kwargs: dict[str, Any] = {
+            "template": manifest.runtime.template,
+            "envs": {k: v for k, v in env_vars.items() if k in _SAFE_ENV_ALLOWLIST},
+            "timeout": _SANDBOX_TIMEOUT,
+            **self._build_network_kwargs(manifest),
+        }
+        if self._pool:
+            return self._pool.acquire(create_kwargs)
+        return Sandbox.create(**create_kwargs)
+
+    def _build_bundle(self, agent_dir: Path, state_dir: Optional[Path]) -> IO[bytes]:
+        """Pack workspace, restored state and agent code into one tarball.
+
+        Paths are relative to the agent home: state at the root, agent
+        code under agent/. The agent is added last so its files win any
+        clash with restored state.
+        """
+        if state_dir:
+            # A previous session on this state may still be extracting
+            # its snapshot; packing now would pick up a partial tree.
+            self._wait_for_teardown(state_dir)
+        buf = tempfile.SpooledTemporaryFile(max_size=_BUNDLE_SPOOL_BYTES)
+        # gzip level 1: the link is fast and stream-mode "w|gz" would
+        # otherwise compress at level 9, which is CPU-bound.
+        with gzip.GzipFile(
+            fileobj=buf, mode="wb", compresslevel=_ARCHIVE_GZIP_LEVEL,
+        ) as gz, tarfile.open(
+            fileobj=gz, mode="w|", bufsize=_BUNDLE_STREAM_BUFSIZE,
+        ) as tar:
+            workspace = tarfile.TarInfo(Path(WORKSPACE_DIR_IN_SANDBOX).name)
+            workspace.type = tarfile.DIRTYPE
+            workspace.mode = 0o755
+            workspace.mtime = int(time.time())
+            tar.addfile(workspace)
+            if state_dir:
+                try:
+                    with os.scandir(state_dir) as entries:
+                        for entry in entries:
+                            tar.add(entry.path, arcname=entry.name)
+                except FileNotFoundError:
+                    pass  # First run — nothing to restore
+            tar.add(
+                str(agent_dir),
+                arcname=Path(AGENT_DIR_IN_SANDBOX).name,
+                filter=_exclude_clutter,
+            )
         buf.seek(0)
+        return buf
+
+    def _upload_bundle(self, sandbox: Sandbox, bundle: IO[bytes]) -> None:
+        """Write the bundle into the sandbox and extract it into agent home."""
         tmp_name = f"/tmp/_upload_{secrets.token_hex(8)}.tar.gz"
-        sandbox.files.write(tmp_name, buf)
-        sandbox.commands.run(f"mkdir -p {remote_dir} && tar xzf {tmp_name} -C {remote_dir} && rm {tmp_name}")
 
-    def _restore_state(self, sandbox: Sandbox, state_dir: Path) -> None:
-        """Restore agent's home directory state from a previous run."""
-        if not state_dir.exists() or not any(state_dir.iterdir()):
-            return
-        self._upload_directory(sandbox, state_dir, AGENT_HOME_IN_SANDBOX)
+        def _write() -> None:
+            bundle.seek(0)
+            sandbox.files.write(tmp_name, bundle)
+
+        _retry(_write, "Uploading agent bundle")
+        # Remove the archive even when extraction fails, but keep tar's
+        # exit status so the failure still surfaces.
+        sandbox.commands.run(
+            f"tar xzf {tmp_name} -C {AGENT_HOME_IN_SANDBOX}; "
+            f"rc=$?; rm -f {tmp_name}; "
+            f"[ $rc -eq 0 ] && touch {_STATE_BASELINE}; exit $rc"
+        )
+
+    def _teardown(
+        self,
+        sandbox: Sandbox,
+        state_dir: Optional[Path],
+        proxy_pid: Optional[int],
+        delegation_handler: Optional["DelegationHandler"],
+    ) -> None:
+        """Persist session state, stop the proxy and kill the sandbox."""
+        if state_dir:
+            try:
+                # Save delegation session mapping for resume
+                if delegation_handler:
+                    delegation_handler.save_session_mapping(state_dir)
+                self._save_state(sandbox, state_dir)
+            except Exception as e:
+                logger.warning("Failed to save state on shutdown: %s", e)
+        if proxy_pid:
+            try:
+                sandbox.commands.run(f"kill {proxy_pid}", user="root")
+            except Exception:
+                pass
+        _kill_quietly(sandbox)
 
     def _save_state(self, sandbox: Sandbox, state_dir: Path) -> None:
         """Snapshot allowed subdirectories of agent home back to host."""
@@ -133,26 +475,44 @@ class SandboxManager:
         # SECURITY: Only persist explicitly allowed directories (allowlist).
         # This prevents dotfile poisoning, config injection, and planted
         # binaries from surviving across sessions.
-        dirs_to_save = " ".join(
-            f"./{d}" for d in _STATE_ALLOW_DIRS
-        )
-        tmp_path = f"/tmp/_state_{secrets.token_hex(8)}.tar.gz"
+        token = secrets.token_hex(8)
+        tmp_path = f"/tmp/_state_{token}.tar.gz"
+        list_path = f"/tmp/_state_{token}.list"
+        # The host copy already holds the restored state, so only entries
+        # changed since extraction need to come back; without a baseline
+        # everything is listed. Only archive (and pay for the download)
+        # when the list is non-empty; the marker says we did.
         result = sandbox.commands.run(
-            f"cd {AGENT_HOME_IN_SANDBOX} && tar czf {tmp_path} {dirs_to_save} 2>/dev/null; true"
+            f"cd {AGENT_HOME_IN_SANDBOX} && "
+            f'if [ -e {_STATE_BASELINE} ]; then newer="-cnewer {_STATE_BASELINE}"; else newer=""; fi; '
+            f"find {_STATE_TAR_ARGS} -mindepth 1 $newer -print0 2>/dev/null > {list_path}; "
+            f"if [ -s {list_path} ]; then "
+            f"tar cf - --null --no-recursion -T {list_path} 2>/dev/null "
+            f"| gzip -{_ARCHIVE_GZIP_LEVEL} > {tmp_path}; "
+            f"echo {_STATE_ARCHIVED_MARKER}; "
+            f"fi; rm -f {list_path}; true"
         )
+        if _STATE_ARCHIVED_MARKER not in (result.stdout or ""):
+            return
         try:
-            tar_bytes = sandbox.files.read(tmp_path, format="bytes")
-            with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar_stream:
+            # Stream the archive through a bounded buffer rather than
+            # holding the whole snapshot in memory.
+            chunks = _retry(
+                lambda: sandbox.files.read(tmp_path, format="stream"),
+                "Downloading session state",
+            )
+            with closing(chunks), tarfile.open(
+                fileobj=io.BufferedReader(_ChunkReader(chunks), _STATE_READ_BUFSIZE),
+                mode="r|gz",
+            ) as tar_stream:
                 # SECURITY: Only extract members with safe paths.
                 # Rejects absolute paths, ".." traversal, and symlinks.
-                safe_members = []
-                for member in tar_stream.getmembers():
+                for member in tar_stream:
                     if member.name.startswith("/") or ".." in member.name.split("/"):
                         continue
                     if member.issym() or member.islnk():
                         continue
-                    safe_members.append(member)
-                tar_stream.extractall(path=str(state_dir), members=safe_members)
+                    tar_stream.extract(member, path=str(state_dir))
         except Exception as e:
             logger.warning("Failed to save session state: %s", e)
 
@@ -165,15 +525,19 @@ class SandboxManager:
         If needs_proxy is True and hidepid=2 fails, raises SandboxError
         to fail closed rather than running the proxy with /proc exposed.
         """
-        sandbox.commands.run(
-            "chmod o-rx /usr/bin/sudo /usr/bin/su /usr/sbin/su 2>/dev/null; "
-            "deluser user sudo 2>/dev/null; true",
-            user="root",
-        )
-        result = sandbox.commands.run(
-            "mount -o remount,hidepid=2 /proc",
-            user="root",
-        )
+        # One round-trip: the privilege drops are best-effort, and the
+        # remount runs last so its status is the command's exit code.
+        # commands.run raises on a non-zero exit; keep the result so the
+        # failure is routed through the fail-closed check below.
+        try:
+            result = sandbox.commands.run(
+                "chmod o-rx /usr/bin/sudo /usr/bin/su /usr/sbin/su 2>/dev/null; "
+                "deluser user sudo 2>/dev/null; "
+                "mount -o remount,hidepid=2 /proc",
+                user="root",
+            )
+        except CommandExitException as e:
+            result = e
         if result.exit_code != 0:
             if needs_proxy:
                 raise SandboxError(
@@ -246,12 +610,12 @@ class SandboxManager:
             return None, {}
 
         # Upload proxy script (hardening already applied by _apply_hardening)
-        sandbox.files.write(_PROXY_PATH_IN_SANDBOX, _PROXY_SCRIPT.read_text(), user="root")
-        sandbox.commands.run(f"chmod 700 {_PROXY_PATH_IN_SANDBOX}", user="root")
+        sandbox.files.write(_PROXY_PATH_IN_SANDBOX, _script_source(_PROXY_SCRIPT), user="root")
 
-        # Start the proxy — /proc is already hidden
+        # Start the proxy — /proc is already hidden. chmod shares the
+        # round-trip; exec keeps the returned pid pointing at python.
         proxy_handle = sandbox.commands.run(
-            f"python3 {_PROXY_PATH_IN_SANDBOX}",
+            f"chmod 700 {_PROXY_PATH_IN_SANDBOX} && exec python3 {_PROXY_PATH_IN_SANDBOX}",
             background=True, stdin=True, user="root", timeout=0,
         )
         proxy_pid = proxy_handle.pid
@@ -261,35 +625,41 @@ class SandboxManager:
             "routes": routes,
             "session_token": session_token,
         }
-        sandbox.commands.send_stdin(proxy_pid, json.dumps(proxy_config) + "\n")
+        sandbox.commands.send_stdin(proxy_pid, ndjson.dumps_line(proxy_config))
 
         # Wait for proxy to emit ready signal on stdout
         proxy_ready = threading.Event()
 
+        proxy_stdout = ndjson.StreamDecoder()
+
         def _watch_proxy_stdout(data: str) -> None:
-            for line in data.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line)
-                    if msg.get("status") == "ready":
-                        proxy_ready.set()
-                except json.JSONDecodeError:
-                    continue
+            for msg in proxy_stdout.feed(data):
+                if msg.get("status") == "ready":
+                    proxy_ready.set()
 
         # Start reading stdout in background thread
         def _read_proxy():
             try:
                 proxy_handle.wait(on_stdout=_watch_proxy_stdout)
             except Exception:
-                pass  # Sandbox killed — expected on shutdown
+                pass  # Disconnected after ready, or sandbox killed
 
         reader = threading.Thread(target=_read_proxy, daemon=True)
         reader.start()
 
+        # SECURITY: Fail closed. Without a ready proxy the agent would be
+        # handed placeholder keys pointing at a port nothing listens on —
+        # or one that a later process could bind.
         if not proxy_ready.wait(timeout=10):
-            logger.warning("Security proxy did not signal ready in time")
+            raise SandboxError("Security proxy did not signal ready in time")
+
+        # The ready line is the only stdout we need. Dropping the event
+        # stream ends the reader thread (and stops buffering proxy output
+        # for the session's lifetime); the proxy itself keeps running.
+        try:
+            proxy_handle.disconnect()
+        except Exception:
+            pass
 
         return proxy_pid, agent_envs
 
@@ -331,14 +701,13 @@ class SandboxManager:
         # Upload proxy (root-owned, agent can't read)
         sandbox.files.write(
             _DELEGATION_PROXY_PATH,
-            _DELEGATION_PROXY_SCRIPT.read_text(),
+            _script_source(_DELEGATION_PROXY_SCRIPT),
             user="root",
         )
-        sandbox.commands.run(f"chmod 700 {_DELEGATION_PROXY_PATH}", user="root")
 
-        # Start delegation proxy as root
+        # Start delegation proxy as root (chmod shares the round-trip)
         deleg_handle = sandbox.commands.run(
-            f"python3 {_DELEGATION_PROXY_PATH}",
+            f"chmod 700 {_DELEGATION_PROXY_PATH} && exec python3 {_DELEGATION_PROXY_PATH}",
             background=True,
             stdin=True,
             user="root",
@@ -361,6 +730,36 @@ class SandboxManager:
 
         return handler
 
+    def _start_proxies(
+        self,
+        sandbox: Sandbox,
+        manifest: AgentManifest,
+        env_vars: dict[str, str],
+        status: Callable[[str], None],
+    ) -> tuple[Optional[int], dict[str, str], Optional["DelegationHandler"]]:
+        """Start whichever proxies the manifest needs, in parallel if both.
+
+        Returns (proxy_pid, agent_envs, delegation_handler).
+        """
+        needs_security = bool(manifest.keys)
+        needs_delegation = manifest.permissions.delegation.enabled
+
+        if needs_security and needs_delegation:
+            status("Starting proxies...")
+            (proxy_pid, agent_envs), delegation_handler = self._run_parallel(
+                lambda: self._start_proxy(sandbox, manifest, env_vars),
+                lambda: self._start_delegation_proxy(sandbox, manifest, env_vars),
+            )
+            return proxy_pid, agent_envs, delegation_handler
+        if needs_security:
+            status("Starting security proxy...")
+            proxy_pid, agent_envs = self._start_proxy(sandbox, manifest, env_vars)
+            return proxy_pid, agent_envs, None
+        if needs_delegation:
+            status("Starting delegation proxy...")
+            return None, {}, self._start_delegation_proxy(sandbox, manifest, env_vars)
+        return None, {}, None
+
     def run_agent(
         self,
         agent_dir: Path,
@@ -378,91 +777,22 @@ class SandboxManager:
                 on_status(msg)
 
         _status("Creating sandbox...")
-        network_kwargs = self._build_network_kwargs(manifest)
-
-        # SECURITY: Only pass known-safe env vars into the sandbox.
-        # Allowlist approach prevents credential leakage via non-standard
-        # env var names (AWS_ACCESS_KEY_ID, DATABASE_URL, etc.).
-        _SAFE_ENV_ALLOWLIST = {
-            "PATH", "HOME", "USER", "SHELL", "LANG", "LC_ALL",
-            "LC_CTYPE", "TERM", "TZ", "PYTHONPATH", "NODE_PATH",
-        }
-        safe_envs = {
-            k: v for k, v in env_vars.items()
-            if k in _SAFE_ENV_ALLOWLIST
-        }
-        # 30 min timeout — delegation scenarios with nested sub-agents
-        # can take several minutes just for setup.
-        sandbox = Sandbox.create(
-            template="base",
-            envs=safe_envs,
-            timeout=1800,
-            **network_kwargs,
-        )
+        # Pack the upload on the host while the sandbox boots.
+        bundle = self._executor.submit(self._build_bundle, agent_dir, state_dir)
+        sandbox = self._create_sandbox(manifest, env_vars)
 
         try:
-            _status("Uploading agent code...")
-            self._upload_directory(sandbox, agent_dir, AGENT_DIR_IN_SANDBOX)
-
-            sandbox.commands.run(f"mkdir -p {WORKSPACE_DIR_IN_SANDBOX}")
-
-            if state_dir:
-                _status("Restoring state...")
-                self._restore_state(sandbox, state_dir)
-
-            # SECURITY: Apply hardening BEFORE setup_command runs.
+            # SECURITY: Hardening completes BEFORE setup_command runs.
             # This prevents malicious setup commands from reading /proc,
             # escalating privileges, or planting background watchers.
-            _status("Hardening sandbox...")
-            self._apply_hardening(sandbox, needs_proxy=bool(manifest.keys))
+            _status("Preparing sandbox...")
+            self._prepare_sandbox(sandbox, bundle, manifest)
 
-            # --- Start proxies in parallel ---
             # SECURITY: Both proxies start BEFORE setup_command to prevent
             # malicious setup from pre-binding proxy ports.
-            proxy_pid, agent_envs = None, {}
-            delegation_handler = None
-
-            needs_security = bool(manifest.keys)
-            needs_delegation = manifest.permissions.delegation.enabled
-
-            if needs_security and needs_delegation:
-                _status("Starting proxies...")
-                proxy_result: list[tuple] = [()]
-                deleg_result: list[Optional["DelegationHandler"]] = [None]
-                errors: list[Exception] = []
-
-                def _start_sec():
-                    try:
-                        proxy_result[0] = self._start_proxy(sandbox, manifest, env_vars)
-                    except Exception as e:
-                        errors.append(e)
-
-                def _start_del():
-                    try:
-                        deleg_result[0] = self._start_delegation_proxy(
-                            sandbox, manifest, env_vars,
-                        )
-                    except Exception as e:
-                        errors.append(e)
-
-                t1 = threading.Thread(target=_start_sec)
-                t2 = threading.Thread(target=_start_del)
-                t1.start()
-                t2.start()
-                t1.join()
-                t2.join()
-                if errors:
-                    raise errors[0]
-                proxy_pid, agent_envs = proxy_result[0]
-                delegation_handler = deleg_result[0]
-            elif needs_security:
-                _status("Starting security proxy...")
-                proxy_pid, agent_envs = self._start_proxy(sandbox, manifest, env_vars)
-            elif needs_delegation:
-                _status("Starting delegation proxy...")
-                delegation_handler = self._start_delegation_proxy(
-                    sandbox, manifest, env_vars,
-                )
+            proxy_pid, agent_envs, delegation_handler = self._start_proxies(
+                sandbox, manifest, env_vars, _status,
+            )
 
             if manifest.runtime.setup_command:
                 _status("Running setup command...")
@@ -476,8 +806,9 @@ class SandboxManager:
                     raise SandboxError(f"Setup command failed: {error_detail}")
 
             _status("Starting agent...")
-            messages: queue.Queue[dict[str, Any]] = queue.Queue()
-            stderr_lines: list[str] = []
+            messages = _MessageBuffer()
+            ready = threading.Event()
+            stderr_buf = io.StringIO()
 
             run_cmd = self._build_run_command(sandbox, manifest, agent_envs)
             cmd_handle = sandbox.commands.run(
@@ -488,27 +819,41 @@ class SandboxManager:
                 user="user",
             )
 
-            def _on_stdout(data: str) -> None:
-                for line in data.split("\n"):
-                    line = line.strip()
-                    if not line:
-                        continue
+            # The E2B callback only hands raw chunks over; decoding runs on
+            # its own thread so a large message can't stall the event pump
+            # that also delivers stderr. None marks the end of the stream.
+            raw_stdout: queue.SimpleQueue[Optional[str]] = queue.SimpleQueue()
+
+            def _parse_stdout() -> None:
+                decoder = ndjson.StreamDecoder()
+                while (data := raw_stdout.get()) is not None:
+                    # Nothing else delivers messages, so a bad chunk must
+                    # not end this thread.
                     try:
-                        msg = json.loads(line)
-                        messages.put(msg)
-                    except json.JSONDecodeError:
-                        continue
+                        for msg in decoder.feed(data):
+                            if ready.is_set():
+                                messages.append(msg)
+                            elif msg.get("type") == "ready":
+                                ready.set()
+                            # Anything before ready (logs, early errors) is dropped
+                    except Exception:
+                        logger.exception("Failed to handle agent stdout")
 
             def _on_stderr(data: str) -> None:
-                stderr_lines.append(data)
+                stderr_buf.write(data)
 
+            threading.Thread(
+                target=_parse_stdout, daemon=True, name="primordial-stdout",
+            ).start()
             return AgentSession(
                 sandbox=sandbox,
                 cmd_handle=cmd_handle,
                 messages=messages,
-                stderr_lines=stderr_lines,
-                on_stdout=_on_stdout,
+                ready=ready,
+                stderr_buf=stderr_buf,
+                on_stdout=raw_stdout.put,
                 on_stderr=_on_stderr,
+                on_exit=lambda: raw_stdout.put(None),
                 manager=self,
                 state_dir=state_dir,
                 proxy_pid=proxy_pid,
@@ -521,6 +866,47 @@ class SandboxManager:
                 pass
             raise
 
+    def run_agent_batch(
+        self,
+        agent_dir: Path,
+        manifest: AgentManifest,
+        workspace: Path,
+        env_vars: dict[str, str],
+        tasks: Iterable[str],
+        state_dir: Optional[Path] = None,
+        timeout: float = 600.0,
+    ) -> Iterator[dict[str, Any]]:
+        """Run a sequence of tasks through one agent session.
+
+        The sandbox is set up once and reused for every task. Each task is
+        sent as a message; everything the agent emits for it is yielded,
+        ending with its final response or error. A task that times out
+        yields a timeout error, and frames it emits later (tagged with its
+        message_id) are dropped rather than attributed to the next task.
+        The session shuts down when the iterator is exhausted or closed.
+        """
+        session = self.run_agent(agent_dir, manifest, workspace, env_vars, state_dir=state_dir)
+        try:
+            if not session.wait_ready():
+                raise SandboxError(f"Agent failed to start: {session.stderr[-500:]}")
+            for task in tasks:
+                message_id = f"batch_{uuid.uuid4().hex[:8]}"
+                session.send_message(task, message_id)
+                while True:
+                    msg = session.receive(timeout=timeout)
+                    if msg is None:
+                        yield {"type": "error", "error": "timeout", "message_id": message_id}
+                        break
+                    if msg.get("message_id", message_id) != message_id:
+                        continue  # Late output from a task that timed out
+                    yield msg
+                    if msg.get("type") == "response" and msg.get("done", False):
+                        break
+                    if msg.get("type") == "error":
+                        break
+        finally:
+            session.shutdown()
+
     def run_agent_terminal(
         self,
         agent_dir: Path,
@@ -545,48 +931,17 @@ class SandboxManager:
                 on_status(msg)
 
         _status("Creating sandbox...")
-        network_kwargs = self._build_network_kwargs(manifest)
-
-        _SAFE_ENV_ALLOWLIST = {
-            "PATH", "HOME", "USER", "SHELL", "LANG", "LC_ALL",
-            "LC_CTYPE", "TERM", "TZ", "PYTHONPATH", "NODE_PATH",
-        }
-        safe_envs = {
-            k: v for k, v in env_vars.items()
-            if k in _SAFE_ENV_ALLOWLIST
-        }
-        # 30 min timeout — delegation scenarios with nested sub-agents
-        # can take several minutes just for setup.
-        sandbox = Sandbox.create(
-            template="base",
-            envs=safe_envs,
-            timeout=1800,
-            **network_kwargs,
-        )
+        # Pack the upload on the host while the sandbox boots.
+        bundle = self._executor.submit(self._build_bundle, agent_dir, state_dir)
+        sandbox = self._create_sandbox(manifest, env_vars)
 
         try:
-            _status("Uploading agent code...")
-            self._upload_directory(sandbox, agent_dir, AGENT_DIR_IN_SANDBOX)
-            sandbox.commands.run(f"mkdir -p {WORKSPACE_DIR_IN_SANDBOX}")
+            _status("Preparing sandbox...")
+            self._prepare_sandbox(sandbox, bundle, manifest)
 
-            if state_dir:
-                _status("Restoring state...")
-                self._restore_state(sandbox, state_dir)
-
-            _status("Hardening sandbox...")
-            self._apply_hardening(sandbox, needs_proxy=bool(manifest.keys))
-
-            proxy_pid, agent_envs = None, {}
-            if manifest.keys:
-                _status("Starting security proxy...")
-                proxy_pid, agent_envs = self._start_proxy(sandbox, manifest, env_vars)
-
-            delegation_handler = None
-            if manifest.permissions.delegation.enabled:
-                _status("Starting delegation proxy...")
-                delegation_handler = self._start_delegation_proxy(
-                    sandbox, manifest, env_vars,
-                )
+            proxy_pid, agent_envs, delegation_handler = self._start_proxies(
+                sandbox, manifest, env_vars, _status,
+            )
 
             if manifest.runtime.setup_command:
                 _status("Running setup command...")
@@ -608,11 +963,11 @@ class SandboxManager:
                     "primaryApiKey": api_key_for_config,
                     "apiKeySource": "environment",
                 })
-                sandbox.commands.run(
-                    f"mkdir -p /home/user/.claude && "
-                    f"echo '{claude_config}' > /home/user/.claude.json && "
-                    f"chown user:user /home/user/.claude.json /home/user/.claude",
-                    user="root",
+                # Written through the filesystem API as the agent user so the
+                # JSON never passes through shell quoting and needs no chown.
+                sandbox.files.make_dir(f"{AGENT_HOME_IN_SANDBOX}/.claude", user="user")
+                sandbox.files.write(
+                    f"{AGENT_HOME_IN_SANDBOX}/.claude.json", claude_config, user="user",
                 )
 
             _status("Starting terminal...")
@@ -676,6 +1031,42 @@ class SandboxManager:
             raise
 
 
+class _MessageBuffer:
+    """Agent stdout messages, appended by the reader and popped by receive().
+
+    deque append/popleft are atomic under the GIL, so the hot path takes
+    no lock; the Event only wakes a consumer that found the buffer empty.
+    """
+
+    def __init__(self) -> None:
+        self._items: deque[dict[str, Any]] = deque()
+        self._available = threading.Event()
+
+    def append(self, msg: dict[str, Any]) -> None:
+        self._items.append(msg)
+        self._available.set()
+
+    def put_back(self, msg: dict[str, Any]) -> None:
+        """Return a message so the next get() sees it first."""
+        self._items.appendleft(msg)
+        self._available.set()
+
+    def get(self, timeout: float) -> Optional[dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                pass
+            # Clear before re-checking so an append in between isn't missed.
+            self._available.clear()
+            if self._items:
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._available.wait(remaining):
+                return None
+
+
 class AgentSession:
     """Wraps a running agent process in an E2B sandbox with NDJSON communication."""
 
@@ -683,23 +1074,27 @@ class AgentSession:
         self,
         sandbox: Sandbox,
         cmd_handle: Any,
-        messages: queue.Queue[dict[str, Any]],
+        messages: _MessageBuffer,
+        ready: threading.Event,
         manager: SandboxManager,
         state_dir: Optional[Path] = None,
-        stderr_lines: Optional[list[str]] = None,
+        stderr_buf: Optional[io.StringIO] = None,
         on_stdout: Optional[Any] = None,
         on_stderr: Optional[Any] = None,
+        on_exit: Optional[Callable[[], None]] = None,
         proxy_pid: Optional[int] = None,
         delegation_handler: Optional["DelegationHandler"] = None,
     ):
         self._sandbox = sandbox
         self._cmd_handle = cmd_handle
         self._messages = messages
+        self._ready = ready
         self._manager = manager
         self._state_dir = state_dir
-        self._stderr_lines = stderr_lines or []
+        self._stderr_buf = stderr_buf or io.StringIO()
         self._on_stdout = on_stdout
         self._on_stderr = on_stderr
+        self._on_exit = on_exit
         self._proxy_pid = proxy_pid
         self._delegation_handler = delegation_handler
         self._alive = True
@@ -719,6 +1114,8 @@ class AgentSession:
             pass
         finally:
             self._alive = False
+            if self._on_exit:
+                self._on_exit()
 
     @property
     def is_alive(self) -> bool:
@@ -726,36 +1123,31 @@ class AgentSession:
 
     @property
     def stderr(self) -> str:
-        return "".join(self._stderr_lines)
+        return self._stderr_buf.getvalue()
 
     def send_message(self, content: str, message_id: str) -> None:
-        msg = json.dumps({
+        msg = ndjson.dumps_line({
             "type": "message", "content": content, "message_id": message_id,
         })
-        self._sandbox.commands.send_stdin(self._cmd_handle.pid, msg + "\n")
+        self._sandbox.commands.send_stdin(self._cmd_handle.pid, msg)
 
     def receive(self, timeout: float = 600.0) -> Optional[dict[str, Any]]:
-        try:
-            return self._messages.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        return self._messages.get(timeout)
+
+    def put_back(self, msg: dict[str, Any]) -> None:
+        """Return a message taken with receive() to the front of the stream."""
+        self._messages.put_back(msg)
 
     def wait_ready(self, timeout: float = 1200.0) -> bool:
-        """Wait for the agent to send a ready signal, skipping non-ready messages."""
-        import time
-        deadline = time.monotonic() + timeout
-        while True:
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                return False
-            msg = self.receive(timeout=remaining)
-            if msg is None:
-                return False
-            if msg.get("type") == "ready":
-                return True
-            # Non-ready messages (logs, early errors) — keep draining
+        """Wait for the agent to send a ready signal."""
+        return self._ready.wait(timeout)
 
-    def shutdown(self) -> None:
+    def shutdown(self) -> Future[None]:
+        """Ask the agent to stop; state save and teardown finish in the background.
+
+        Returns the teardown future; once it is done the state is on disk.
+        Starting a new session on the same state_dir waits for it too.
+        """
         try:
             # Shutdown delegation handler first (saves sub-agent state)
             if self._delegation_handler:
@@ -765,29 +1157,19 @@ class AgentSession:
                     logger.warning("Failed to shutdown delegation handler: %s", e)
 
             if self.is_alive:
-                shutdown_msg = json.dumps({"type": "shutdown"})
-                self._sandbox.commands.send_stdin(self._cmd_handle.pid, shutdown_msg + "\n")
-                self._reader_thread.join(timeout=3)
+                self._sandbox.commands.send_stdin(self._cmd_handle.pid, _SHUTDOWN_FRAME)
         except Exception:
             pass
         finally:
-            if self._state_dir:
-                try:
-                    # Save delegation session mapping for resume
-                    if self._delegation_handler:
-                        self._delegation_handler.save_session_mapping(self._state_dir)
-                    self._manager._save_state(self._sandbox, self._state_dir)
-                except Exception as e:
-                    logger.warning("Failed to save state on shutdown: %s", e)
-            if self._proxy_pid:
-                try:
-                    self._sandbox.commands.run(f"kill {self._proxy_pid}", user="root")
-                except Exception:
-                    pass
-            try:
-                self._sandbox.kill()
-            except Exception:
-                pass
+            teardown = self._manager._schedule_teardown(self._state_dir, self._finish_shutdown)
+        return teardown
+
+    def _finish_shutdown(self) -> None:
+        # Give the agent a moment to exit and flush state before the snapshot.
+        self._reader_thread.join(timeout=3)
+        self._manager._teardown(
+            self._sandbox, self._state_dir, self._proxy_pid, self._delegation_handler,
+        )
 
 
 class TerminalSession:
@@ -842,7 +1224,11 @@ class TerminalSession:
         except Exception:
             pass
 
-    def shutdown(self) -> None:
+    def shutdown(self) -> Future[None]:
+        """Stop delegation; state save and teardown finish in the background.
+
+        Returns the teardown future, as AgentSession.shutdown does.
+        """
         try:
             if self._delegation_handler:
                 try:
@@ -852,22 +1238,11 @@ class TerminalSession:
         except Exception:
             pass
         finally:
-            if self._state_dir:
-                try:
-                    if self._delegation_handler:
-                        self._delegation_handler.save_session_mapping(self._state_dir)
-                    self._manager._save_state(self._sandbox, self._state_dir)
-                except Exception as e:
-                    logger.warning("Failed to save state on shutdown: %s", e)
-            if self._proxy_pid:
-                try:
-                    self._sandbox.commands.run(f"kill {self._proxy_pid}", user="root")
-                except Exception:
-                    pass
-            try:
-                self._sandbox.kill()
-            except Exception:
-                pass
+            teardown = self._manager._schedule_teardown(
+                self._state_dir, self._manager._teardown,
+                self._sandbox, self._state_dir, self._proxy_pid, self._delegation_handler,
+            )
+        return teardown
 
 
 class DelegationHandler:
@@ -931,19 +1306,14 @@ class DelegationHandler:
 
     def _read_proxy_stdout(self) -> None:
         """Read NDJSON from delegation proxy stdout and queue messages."""
+        proxy_stdout = ndjson.StreamDecoder()
+
         def _on_stdout(data: str) -> None:
-            for line in data.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line)
-                    if msg.get("type") == "delegation_ready":
-                        self._ready.set()
-                    else:
-                        self._messages.put(msg)
-                except json.JSONDecodeError:
-                    continue
+            for msg in proxy_stdout.feed(data):
+                if msg.get("type") == "delegation_ready":
+                    self._ready.set()
+                else:
+                    self._messages.put(msg)
 
         def _on_stderr(data: str) -> None:
             logger.debug("Delegation proxy stderr: %s", data.strip())
@@ -955,7 +1325,7 @@ class DelegationHandler:
 
     def _send_to_proxy(self, msg: dict) -> None:
         """Write NDJSON response to the delegation proxy's stdin (thread-safe)."""
-        line = json.dumps(msg) + "\n"
+        line = ndjson.dumps_line(msg)
         with self._lock:
             self._sandbox.commands.send_stdin(
                 self._deleg_handle.pid,
@@ -1171,7 +1541,7 @@ class DelegationHandler:
             sub_providers.append("e2b")  # Always needed for sandbox creation
 
             if sub_manifest.keys:
-                missing = [kr for kr in sub_manifest.keys if kr.required and not vault.get_key(kr.provider)]
+                missing = [kr for kr in sub_manifest.keys if kr.required and not vault.has_key(kr.provider)]
                 if missing:
                     from rich.console import Console
                     console = Console()
@@ -3,20 +3,122 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import os
 import platform
 import subprocess
 import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from cryptography.fernet import Fernet, InvalidToken
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
 from pydantic import BaseModel
 
 
+class _RFernet:
+    """rfernet (Rust) behind cryptography's bytes-in/bytes-out Fernet API.
+
+    Tokens are interchangeable, so vaults written by either backend
+    stay readable by the other.
+    """
+
+    def __init__(self, key: bytes):
+        import rfernet
+
+        self._fernet = rfernet.Fernet(key.decode())
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self._fernet.encrypt(data).encode()
+
+    def decrypt(self, token: bytes) -> bytes:
+        return self._fernet.decrypt(token.decode())
+
+
+@lru_cache(maxsize=1)
+def _fernet_backend() -> tuple[Callable[[bytes], Any], type[Exception]]:
+    """Return (Fernet factory, invalid-token error), importing on first use.
+
+    Loading cryptography's OpenSSL bindings is deferred to the first
+    encrypt/decrypt, so paths like list_keys and has_key never pay it.
+    """
+    try:
+        import rfernet
+    except ImportError:
+        from cryptography.fernet import Fernet, InvalidToken
+
+        return Fernet, InvalidToken
+    return _RFernet, rfernet.DecryptionError
+
+
+# Derived keys for this process, keyed by a digest of the KDF inputs so a
+# vault reopened later (daemon requests, sub-agent setup) skips PBKDF2.
+# Never persisted: a key file on disk would bypass the keychain secret.
+_derived_keys: dict[bytes, bytes] = {}
+
+
+@lru_cache(maxsize=1)
+def _machine_id() -> str:
+    """Machine identifier; cached because macOS has to spawn ioreg for it."""
+    system = platform.system()
+    if system == "Darwin":
+        try:
+            result = subprocess.run(
+                ["ioreg", "-rd1", "-c", "IOPlatformExpertDevice"],
+                capture_output=True,
+                text=True,
+                timeout=5,
+            )
+            for line in result.stdout.splitlines():
+                if "IOPlatformUUID" in line:
+                    return line.split('"')[-2]
+        except Exception:
+            pass
+    elif system == "Linux":
+        for path in ("/etc/machine-id", "/var/lib/dbus/machine-id"):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                return os.read(fd, 64).decode().strip()
+            finally:
+                os.close(fd)
+    return f"{platform.node()}-{uuid.getnode()}"
+
+
+@lru_cache(maxsize=64)
+def _env_var_name(provider: str) -> str:
+    return f"{provider.upper().replace('-', '_')}_API_KEY"
+
+
+def _read_private(path: Path, label: str) -> Optional[bytes]:
+    """Read a file that must be mode 0600, or None if it doesn't exist.
+
+    The permission check uses fstat on the descriptor being read, so the
+    file can't be swapped between the check and the read.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        # SECURITY: Verify permissions haven't been loosened
+        st = os.fstat(fd)
+        mode = st.st_mode & 0o777
+        if mode != 0o600:
+            raise RuntimeError(
+                f"{label} has unsafe permissions ({oct(mode)}). "
+                f"Expected 0600. Fix with: chmod 600 {path}"
+            )
+        chunks = []
+        while chunk := os.read(fd, max(st.st_size, 4096)):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
 class KeyEntry(BaseModel):
     provider: str
     key_id: str
@@ -46,30 +148,13 @@ class KeyVault:
         self._path = vault_path
         self._password = password or ""
         self._data: Optional[KeyVaultData] = None
-        self._fernet: Optional[Fernet] = None
+        # (provider, key_id) -> entry; authoritative once loaded, written
+        # back to _data.entries on save.
+        self._index: dict[tuple[str, str], KeyEntry] = {}
+        self._fernet: Optional[Any] = None
 
     def _get_machine_id(self) -> str:
-        system = platform.system()
-        if system == "Darwin":
-            try:
-                result = subprocess.run(
-                    ["ioreg", "-rd1", "-c", "IOPlatformExpertDevice"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-                for line in result.stdout.splitlines():
-                    if "IOPlatformUUID" in line:
-                        return line.split('"')[-2]
-            except Exception:
-                pass
-        elif system == "Linux":
-            for path in ["/etc/machine-id", "/var/lib/dbus/machine-id"]:
-                try:
-                    return Path(path).read_text().strip()
-                except FileNotFoundError:
-                    continue
-        return f"{platform.node()}-{uuid.getnode()}"
+        return _machine_id()
 
     def _get_keychain_secret(self) -> str:
         """Get or create a random secret stored in the system keychain.
@@ -105,8 +190,8 @@ class KeyVault:
                      "-a", self._KEYCHAIN_ACCOUNT,
                      "-X", secret_hex,
                      "-U"],  # Update if exists
-                    capture_output=True, text=True, timeout=10,
-                    check=True,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    timeout=10, check=True,
                 )
                 return secret
             except Exception:
@@ -123,15 +208,9 @@ class KeyVault:
         # Linux: use a file-based secret with restricted permissions.
         # This is the only option on non-macOS platforms.
         secret_path = self._path.parent / ".vault_secret"
-        if secret_path.exists():
-            # SECURITY: Verify permissions haven't been loosened
-            mode = secret_path.stat().st_mode & 0o777
-            if mode != 0o600:
-                raise RuntimeError(
-                    f"Vault secret file has unsafe permissions ({oct(mode)}). "
-                    f"Expected 0600. Fix with: chmod 600 {secret_path}"
-                )
-            return secret_path.read_text().strip()
+        existing = _read_private(secret_path, "Vault secret file")
+        if existing is not None:
+            return existing.decode().strip()
         secret = base64.urlsafe_b64encode(os.urandom(32)).decode()
         secret_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
         # SECURITY: Create file with 0600 atomically to prevent TOCTOU race.
@@ -146,45 +225,44 @@ class KeyVault:
         machine_id = self._get_machine_id()
         keychain_secret = self._get_keychain_secret()
         key_material = f"{machine_id}:{keychain_secret}:{self._password}".encode()
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=600_000,
+        cache_key = hashlib.sha256(salt + b"\0" + key_material).digest()
+        cached = _derived_keys.get(cache_key)
+        if cached is not None:
+            return cached
+        # hashlib runs the loop in OpenSSL with the GIL released; output is
+        # identical to cryptography's PBKDF2HMAC for the same parameters.
+        derived = base64.urlsafe_b64encode(
+            hashlib.pbkdf2_hmac("sha256", key_material, salt, 600_000, dklen=32)
         )
-        derived = kdf.derive(key_material)
-        return base64.urlsafe_b64encode(derived)
+        _derived_keys[cache_key] = derived
+        return derived
 
-    def _get_fernet(self) -> Fernet:
+    def _get_fernet(self) -> Any:
         if self._fernet is None:
             data = self._load()
             salt = base64.b64decode(data.salt)
             key = self._derive_key(salt)
-            self._fernet = Fernet(key)
+            fernet_factory, _ = _fernet_backend()
+            self._fernet = fernet_factory(key)
         return self._fernet
 
     def _load(self) -> KeyVaultData:
         if self._data is not None:
             return self._data
-        if self._path.exists():
-            # SECURITY: Verify vault file permissions haven't been loosened
-            mode = self._path.stat().st_mode & 0o777
-            if mode != 0o600:
-                raise RuntimeError(
-                    f"Vault file has unsafe permissions ({oct(mode)}). "
-                    f"Expected 0600. Fix with: chmod 600 {self._path}"
-                )
-            raw = self._path.read_text()
+        raw = _read_private(self._path, "Vault file")
+        if raw is not None:
             self._data = KeyVaultData.model_validate_json(raw)
         else:
             salt = os.urandom(16)
             self._data = KeyVaultData(salt=base64.b64encode(salt).decode())
             self._save()
+        self._index = {(e.provider, e.key_id): e for e in self._data.entries}
         return self._data
 
     def _save(self) -> None:
         if self._data is None:
             return
+        self._data.entries = list(self._index.values())
         self._path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
         # Enforce permissions even if dir already existed (mkdir ignores mode with exist_ok)
         self._path.parent.chmod(0o700)
@@ -194,7 +272,7 @@ class KeyVault:
         # SECURITY: O_NOFOLLOW prevents symlink attacks on the temp file
         fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
         try:
-            os.write(fd, self._data.model_dump_json(indent=2).encode())
+            os.write(fd, self._data.model_dump_json().encode())
         finally:
             os.close(fd)
         os.replace(str(tmp_path), str(self._path))
@@ -204,54 +282,55 @@ class KeyVault:
         fernet = self._get_fernet()
         encrypted = fernet.encrypt(api_key.encode())
 
-        data = self._load()
-        data.entries = [
-            e for e in data.entries if not (e.provider == provider and e.key_id == key_id)
-        ]
-        data.entries.append(
-            KeyEntry(
-                provider=provider,
-                key_id=key_id,
-                encrypted_value=base64.b64encode(encrypted).decode(),
-                created_at=datetime.now(timezone.utc).isoformat(),
-            )
+        self._load()
+        # Pop first so a replaced key moves to the end, as before.
+        self._index.pop((provider, key_id), None)
+        self._index[(provider, key_id)] = KeyEntry(
+            provider=provider,
+            key_id=key_id,
+            encrypted_value=base64.b64encode(encrypted).decode(),
+            created_at=datetime.now(timezone.utc).isoformat(),
         )
         self._save()
         return key_id
 
+    def has_key(self, provider: str, key_id: Optional[str] = None) -> bool:
+        """Check whether a key is stored, without deriving or decrypting."""
+        self._load()
+        return (provider, key_id or provider) in self._index
+
     def get_key(self, provider: str, key_id: Optional[str] = None) -> Optional[str]:
         key_id = key_id or provider
-        data = self._load()
-        for entry in data.entries:
-            if entry.provider == provider and entry.key_id == key_id:
-                try:
-                    fernet = self._get_fernet()
-                    encrypted = base64.b64decode(entry.encrypted_value)
-                    decrypted = fernet.decrypt(encrypted)
-                    entry.last_used = datetime.now(timezone.utc).isoformat()
-                    self._save()
-                    return decrypted.decode()
-                except InvalidToken:
-                    raise ValueError(
-                        "Failed to decrypt key. The vault may have been created "
-                        "on a different machine or with a different password."
-                    )
-        return None
+        self._load()
+        entry = self._index.get((provider, key_id))
+        if entry is None:
+            return None
+        decrypted = self._decrypt(entry)
+        entry.last_used = datetime.now(timezone.utc).isoformat()
+        self._save()
+        return decrypted
+
+    def _decrypt(self, entry: KeyEntry) -> str:
+        _, invalid_token = _fernet_backend()
+        try:
+            fernet = self._get_fernet()
+            return fernet.decrypt(base64.b64decode(entry.encrypted_value)).decode()
+        except invalid_token:
+            raise ValueError(
+                "Failed to decrypt key. The vault may have been created "
+                "on a different machine or with a different password."
+            )
 
     def remove_key(self, provider: str, key_id: Optional[str] = None) -> bool:
         key_id = key_id or provider
-        data = self._load()
-        original_count = len(data.entries)
-        data.entries = [
-            e for e in data.entries if not (e.provider == provider and e.key_id == key_id)
-        ]
-        if len(data.entries) < original_count:
+        self._load()
+        if self._index.pop((provider, key_id), None) is not None:
             self._save()
             return True
         return False
 
     def list_keys(self) -> list[dict]:
-        data = self._load()
+        self._load()
         return [
             {
                 "provider": e.provider,
@@ -259,18 +338,24 @@ class KeyVault:
                 "created_at": e.created_at,
                 "last_used": e.last_used,
             }
-            for e in data.entries
+            for e in self._index.values()
         ]
 
     def get_env_vars(self, providers: Optional[list[str]] = None) -> dict[str, str]:
         """Get API keys as environment variables for sandbox injection."""
         result = {}
-        data = self._load()
-        for entry in data.entries:
-            if providers and entry.provider not in providers:
+        wanted = frozenset(providers) if providers else None
+        self._load()
+        now = datetime.now(timezone.utc).isoformat()
+        used = False
+        for entry in self._index.values():
+            if wanted is not None and entry.provider not in wanted:
                 continue
-            env_var = f"{entry.provider.upper().replace('-', '_')}_API_KEY"
-            key = self.get_key(entry.provider, entry.key_id)
+            key = self._decrypt(entry)
+            entry.last_used = now
+            used = True
             if key:
-                result[env_var] = key
+                result[_env_var_name(entry.provider)] = key
+        if used:
+            self._save()
         return result
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+from typing import Iterator
+
 from primordial.models import AgentManifest
 
+_detail = "  [bright_black]- {}[/bright_black]".format
+
 
 def format_permissions_for_display(
     manifest: AgentManifest,
@@ -16,38 +20,43 @@ def format_permissions_for_display(
         stored_providers: Set of provider names that have stored keys.
             If None, key status is not shown.
     """
-    lines = []
-
-    if manifest.permissions.network_unrestricted:
-        lines.append("Network access: UNRESTRICTED (full internet)")
-    elif manifest.permissions.network:
-        lines.append("Network access:")
-        for net in manifest.permissions.network:
-            lines.append(f"  [bright_black]- {net.domain}: {net.reason}[/bright_black]")
+    return list(_permission_lines(manifest, stored_providers))
+
+
+def _permission_lines(
+    manifest: AgentManifest, stored_providers: set[str] | None,
+) -> Iterator[str]:
+    perms = manifest.permissions
+
+    if perms.network_unrestricted:
+        yield "Network access: UNRESTRICTED (full internet)"
+    elif perms.network:
+        yield "Network access:"
+        for net in perms.network:
+            yield _detail(f"{net.domain}: {net.reason}")
     else:
-        lines.append("Network access: None (sandbox isolated)")
+        yield "Network access: None (sandbox isolated)"
 
-    lines.append("Workspace access:")
-    lines.append(f"  [bright_black]- {manifest.permissions.filesystem.workspace}[/bright_black]")
+    yield "Workspace access:"
+    yield _detail(perms.filesystem.workspace)
 
-    if manifest.permissions.delegation.enabled:
-        lines.append("Agent delegation: ENABLED")
-        for a in manifest.permissions.delegation.allowed_agents:
-            lines.append(f"  - Can call: {a}")
+    if perms.delegation.enabled:
+        yield "Agent delegation: ENABLED"
+        for a in perms.delegation.allowed_agents:
+            yield f"  - Can call: {a}"
 
     if manifest.keys:
-        lines.append("API keys:")
+        yield "API keys:"
         for key_req in manifest.keys:
             label = "required" if key_req.required else "optional"
             env = key_req.resolved_env_var()
-            if stored_providers is not None:
-                status = "[green]stored[/green]" if key_req.provider in stored_providers else "[red]missing[/red]"
-                lines.append(f"  [bright_black]- {key_req.provider} ({env}): {label} — {status}[/bright_black]")
+            if stored_providers is None:
+                yield _detail(f"{key_req.provider} ({env}): {label}")
             else:
-                lines.append(f"  [bright_black]- {key_req.provider} ({env}): {label}[/bright_black]")
+                status = "[green]stored[/green]" if key_req.provider in stored_providers else "[red]missing[/red]"
+                yield _detail(f"{key_req.provider} ({env}): {label} — {status}")
 
     r = manifest.runtime.resources
-    lines.append("Resources:")
-    lines.append(f"  [bright_black]- {r.max_memory} RAM[/bright_black]")
-    lines.append(f"  [bright_black]- {r.max_cpu} CPUs[/bright_black]")
-    return lines
+    yield "Resources:"
+    yield _detail(f"{r.max_memory} RAM")
+    yield _detail(f"{r.max_cpu} CPUs")
@@ -0,0 +1,130 @@
+"""Tests for the NDJSON protocol helpers."""
+
+import importlib.util
+import json
+import sys
+
+import pytest
+
+import primordial.ndjson
+from primordial.ndjson import StreamDecoder
+
+
+def _load_backend(block_orjson: bool):
+    """A fresh copy of primordial.ndjson, optionally with orjson hidden."""
+    spec = importlib.util.find_spec("primordial.ndjson")
+    module = importlib.util.module_from_spec(spec)
+    saved = sys.modules.get("orjson")
+    if block_orjson:
+        sys.modules["orjson"] = None  # makes "import orjson" raise ImportError
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if block_orjson:
+            if saved is None:
+                del sys.modules["orjson"]
+            else:
+                sys.modules["orjson"] = saved
+    return module
+
+
+_PAYLOADS = [
+    {"type": "ready"},
+    {"type": "response", "content": "héllo — ✓ 日本", "message_id": "m1", "done": True},
+    {"type": "activity", "nested": {"list": [1, 2.5, None, True, False]}, "empty": {}},
+    {"type": "response", "big": 123456789012345678901234567890, "neg": -(2**63) - 1},
+    {"type": "response", "u64": 2**64 - 1, "i64": -(2**63)},
+    {"type": "response", "id": "12345678901234567890123"},
+    {"type": "response", "quote": 'say "hi"\n\tand \\ bye', "control": "\x01"},
+    {"type": "response", "floats": [1e16, 1e-7, 1.5e300, -2.5e-300, 0.1]},
+    {"type": "response", "surrogate": "\ud800", "mixed": "a\udfffé"},
+]
+
+# Lines as Python's json.dumps writes them by default; orjson rejects
+# these, so they exercise the stdlib fallback in loads.
+_STDLIB_ONLY_LINES = [
+    '{"a": NaN}',
+    '{"a": Infinity, "b": -Infinity}',
+    '{"a": 1e400}',
+    '{"s": "\\ud800"}',
+    '{"s": "\\udfff tail", "n": 123456789012345678901234567890}',
+]
+
+
+class TestStreamDecoder:
+    def test_joins_lines_split_across_chunks(self):
+        decoder = StreamDecoder()
+        assert decoder.feed('{"type": "re') == []
+        assert decoder.feed('ady"}\n{"a": 1}\n') == [{"type": "ready"}, {"a": 1}]
+
+    def test_skips_blank_and_invalid_lines(self):
+        decoder = StreamDecoder()
+        assert decoder.feed('\n  \nnot json\n{"a": 1}\n') == [{"a": 1}]
+
+    def test_skips_non_object_values(self):
+        decoder = StreamDecoder()
+        data = '1\n[1, 2]\n"text"\nnull\ntrue\n{"type": "ready"}\n'
+        assert decoder.feed(data) == [{"type": "ready"}]
+
+
+@pytest.fixture(scope="module")
+def backends():
+    """(orjson backend, stdlib backend)."""
+    pytest.importorskip("orjson")
+    fast = _load_backend(block_orjson=False)
+    assert fast.orjson is not None
+    std = _load_backend(block_orjson=True)
+    assert std.orjson is None
+    return fast, std
+
+
+class TestBackends:
+    """The optional orjson backend must decode and encode like the stdlib one."""
+
+    @pytest.mark.parametrize("payload", _PAYLOADS)
+    def test_encodings_decode_to_the_same_value(self, backends, payload):
+        fast, std = backends
+        for backend in backends:
+            line = backend.dumps_line(payload)
+            assert line.endswith("\n") and "\n" not in line[:-1]
+            assert backend.dumps_bytes(payload) == line.encode()
+            assert fast.loads(line) == std.loads(line) == payload
+
+    def test_text_encodes_identically(self, backends):
+        fast, std = backends
+        payload = {"type": "response", "content": "héllo — ✓ 日本", "n": [1, -2]}
+        assert fast.dumps_line(payload) == std.dumps_line(payload) == (
+            '{"type":"response","content":"héllo — ✓ 日本","n":[1,-2]}\n'
+        )
+
+    @pytest.mark.parametrize("payload", _PAYLOADS)
+    def test_round_trip_exactly(self, backends, payload):
+        fast, std = backends
+        line = std.dumps_line(payload)
+        assert fast.loads(line) == std.loads(line) == payload
+
+    def test_large_integers_stay_integers(self, backends):
+        line = '{"n": 123456789012345678901234567890}'
+        for backend in backends:
+            value = backend.loads(line)["n"]
+            assert isinstance(value, int)
+            assert value == 123456789012345678901234567890
+
+    @pytest.mark.parametrize("line", _STDLIB_ONLY_LINES)
+    def test_decode_what_stdlib_accepts(self, backends, line):
+        fast, std = backends
+        # repr, so NaN compares equal to NaN
+        assert repr(fast.loads(line)) == repr(std.loads(line))
+
+    def test_invalid_json_still_raises(self, backends):
+        for backend in backends:
+            with pytest.raises(json.JSONDecodeError):
+                backend.loads('{"a": }')
+
+    def test_decoder_keeps_nan_messages(self, backends):
+        for backend in backends:
+            msgs = backend.StreamDecoder().feed('{"type": "response", "v": NaN}\n')
+            assert len(msgs) == 1 and msgs[0]["type"] == "response"
+
+    def test_active_backend_is_compact_utf8(self):
+        assert primordial.ndjson.dumps_line({"a": "é"}) == '{"a":"é"}\n'
@@ -0,0 +1,81 @@
+"""Tests for SandboxManager session orchestration."""
+
+from collections import deque
+from pathlib import Path
+
+from primordial.sandbox.manager import SandboxManager
+
+
+class FakeSession:
+    """Stands in for AgentSession; replies come from a per-task script.
+
+    script[i] is called with the message_id of the i-th task and returns
+    the frames (None meaning a receive timeout) queued after it is sent.
+    """
+
+    def __init__(self, script):
+        self._script = deque(script)
+        self._frames = deque()
+        self.sent = []
+        self.shut_down = False
+
+    def wait_ready(self, timeout=1200.0):
+        return True
+
+    def send_message(self, content, message_id):
+        self.sent.append((content, message_id))
+        self._frames.extend(self._script.popleft()(message_id))
+
+    def receive(self, timeout=600.0):
+        return self._frames.popleft() if self._frames else None
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+def _run_batch(monkeypatch, session, tasks):
+    manager = SandboxManager()
+    monkeypatch.setattr(manager, "run_agent", lambda *args, **kwargs: session)
+    return list(manager.run_agent_batch(Path("."), None, Path("."), {}, tasks))
+
+
+def test_each_task_ends_at_its_final_response(monkeypatch):
+    session = FakeSession([
+        lambda mid: [
+            {"type": "activity", "message_id": mid},
+            {"type": "response", "content": "a", "message_id": mid, "done": True},
+        ],
+        lambda mid: [{"type": "response", "content": "b", "message_id": mid, "done": True}],
+    ])
+
+    out = _run_batch(monkeypatch, session, ["first", "second"])
+
+    (_, first_id), (_, second_id) = session.sent
+    assert [(m["type"], m["message_id"]) for m in out] == [
+        ("activity", first_id),
+        ("response", first_id),
+        ("response", second_id),
+    ]
+    assert session.shut_down
+
+
+def test_late_frames_from_timed_out_task_are_dropped(monkeypatch):
+    first_id = []
+    session = FakeSession([
+        lambda mid: first_id.append(mid) or [{"type": "activity", "message_id": mid}, None],
+        lambda mid: [
+            # The first task finishes only after the second was sent.
+            {"type": "response", "content": "late", "message_id": first_id[0], "done": True},
+            {"type": "response", "content": "b", "message_id": mid, "done": True},
+        ],
+    ])
+
+    out = _run_batch(monkeypatch, session, ["first", "second"])
+
+    second_id = session.sent[1][1]
+    assert out == [
+        {"type": "activity", "message_id": first_id[0]},
+        {"type": "error", "error": "timeout", "message_id": first_id[0]},
+        {"type": "response", "content": "b", "message_id": second_id, "done": True},
+    ]
+    assert session.shut_down